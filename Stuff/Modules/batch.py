@@ -0,0 +1,443 @@
+"""
+Copyright 2013 Štěpán Bahník
+
+This file is part of Carousel Maze Manager.
+
+Carousel Maze Manager is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Carousel Maze Manager is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Carousel Maze Manager.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from collections import namedtuple, defaultdict, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from time import localtime, strftime
+from operator import methodcaller
+from os.path import basename
+import pickle
+import os
+import csv
+
+
+from optionget import optionGet
+from version import version
+import mode as m
+
+
+# everything needed for computation of results of one file - has to be picklable, because
+# jobs are sent to other processes when files are processed in parallel
+#   - methods is an OrderedDict {name of parameter: list of methodcallers}
+Job = namedtuple("Job", ["mode", "file", "pairedFile", "removeReflections", "reflections",
+                         "methods", "developer"])
+
+# loaded is False when the file could not be loaded (results and problems are None then),
+# results contains values in order of methods ("NA" if computation failed) and problems
+# contains a name of a parameter for each value that could not be computed
+Computed = namedtuple("Computed", ["loaded", "results", "problems"])
+
+
+def computeFile(job):
+    """loads a file and computes all methods for it - does not use GUI, therefore it can be
+    called in another process"""
+    if m.mode != job.mode:
+        m.changeMode(job.mode)
+
+    # loading of cm object
+    if job.methods:
+        try:
+            cm = m.CL(job.file, job.pairedFile)
+            if job.removeReflections:
+                cm.removeReflections(points = job.reflections)
+        except Exception as e:
+            if job.developer:
+                print(e)
+            return Computed(False, None, None)
+
+    results = []
+    problems = []
+    for name, funcs in job.methods.items():
+        for func in funcs:
+            try:
+                results.append(func(cm))
+            except Exception as e:
+                if job.developer:
+                    print(e)
+                results.append("NA")
+                problems.append(name)
+
+    return Computed(True, results, problems)
+
+
+
+class Batch:
+    """processing of files without GUI - used by Processor and by headless processing
+        - results are collected in self.results and problems in self.log
+        - names are names of parameters in m.parameters, batchTime is a list of (start, end)
+            tuples or None if startTime and time should be used
+        - processWhat and removeReflectionsWhere are the values of the processing options,
+            e.g. "all files" or "tagged files"
+    """
+    def __init__(self, fileStorage, names, startTime, time, output, batchTime = None,
+                 processWhat = "all files", removeReflectionsWhere = "no files",
+                 saveTags = False, saveComments = False):
+        self.fileStorage = fileStorage
+        self.files = [file for file in fileStorage if processFile(processWhat, file,
+                                                                  fileStorage)]
+        self.output = outputFile(output)
+        self.removeReflectionsWhere = removeReflectionsWhere
+        self.saveTags = saveTags
+        self.saveComments = saveComments
+        self.separator = optionGet("ResultSeparator", ",", "str", True)
+        self.developer = optionGet("Developer", False, 'bool', True)
+        self.someProblem = False
+        self.methods = selectMethods(names, startTime, time, batchTime)
+        self.log = Log(self.methods, startTime, time, self.files, fileStorage,
+                       removeReflectionsWhere, self.output, batchTime = batchTime)
+        self.results = self._header(batchTime)
+
+
+    def _header(self, batchTime):
+        separator = self.separator
+        if batchTime is not None:
+            results = ["File"]
+            for method in self.methods:
+                if method in m.parameters.noBatch:
+                    results.append(method)
+                else:
+                    results.extend([method + " ({}-{})".format(start, end) for
+                                    start, end in batchTime])
+            results = separator.join(results)
+        else:
+            results = separator.join(["File"] + [method for method in self.methods])
+        if self.saveTags:
+            results += separator + "Tag"
+        if self.saveComments:
+            results += separator + "Comment"
+        return results
+
+
+    def jobs(self):
+        "returns jobs for computation of results of all files (see Job)"
+        return [Job(m.mode, file, self.fileStorage.pairedfiles.get(file, "auto"),
+                    removeReflections(self.removeReflectionsWhere, file, self.fileStorage),
+                    self.fileStorage.reflections.get(file, None), self.methods, self.developer)
+                for file in self.files]
+
+
+    def add(self, file, computed):
+        "adds results computed for a file - returns False if the file was not loaded"
+        separator = self.separator
+        filename = returnName(filename = file, allFiles = self.fileStorage.arenafiles)
+
+        if not computed.loaded:
+            self.results += "\n" + filename + "{}NA".format(separator) * len(self.methods)
+            self.log.failedToLoad.append(file)
+            self.someProblem = True
+            return False
+
+        for name in computed.problems:
+            self.log.methodProblems[name].append(file)
+            self.someProblem = True
+
+        result = separator.join(map(str, computed.results))
+        if self.methods:
+            result = separator + result
+        self.results += "\n" + filename + result
+
+        # tag inclusion in results
+        if self.saveTags:
+            if file in self.fileStorage.tagged:
+                self.results += separator + "1"
+            else:
+                self.results += separator + "0"
+
+        # comment inclusion in results
+        if self.saveComments:
+            self.results += separator + self.fileStorage.comments[file]
+
+        return True
+
+
+    def write(self):
+        "writes results and log"
+        writeResults(self.output, self.results)
+        self.log.writeLog()
+
+
+    def run(self, processes = 1):
+        "computes results of all files, uses more processes if processes > 1"
+        jobs = self.jobs()
+        if processes > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(min(processes, len(jobs))) as executor:
+                for file, computed in zip(self.files, executor.map(computeFile, jobs)):
+                    self.add(file, computed)
+        else:
+            for job in jobs:
+                self.add(job.file, computeFile(job))
+        self.write()
+
+
+
+class StoredFiles:
+    """files saved by FileStorage (in a .files file) loaded without GUI - see loadFiles
+        - contains the same attributes as filestorage.FileStorage
+    """
+    def __init__(self, files = ()):
+        self.arenafiles = list(files)
+        self.wrongfiles = []
+        self.reflections = {}
+        self.tagged = []
+        self.pairedfiles = {}
+        self.addedReflections = {}
+        self.comments = defaultdict(str)
+        self.lastSave = None
+        self.mode = m.mode
+
+    def __iter__(self):
+        return iter(self.arenafiles)
+
+    def __len__(self):
+        return len(self.arenafiles)
+
+
+
+class _FilesUnpickler(pickle.Unpickler):
+    "loads FileStorage as StoredFiles, so that filestorage module (and tkinter) is not imported"
+    def find_class(self, module, name):
+        if (module, name) == ("filestorage", "FileStorage"):
+            return StoredFiles
+        return super().find_class(module, name)
+
+
+def loadFiles(file):
+    "returns StoredFiles loaded from a .files file saved by FileStorage"
+    with open(file, mode = "rb") as infile:
+        loaded = _FilesUnpickler(infile).load()
+    stored = StoredFiles()
+    stored.__dict__.update(loaded.__dict__)
+    return stored
+
+
+
+def selectMethods(names, startTime, time, batchTime = None):
+    """returns OrderedDict {name of parameter: list of methodcallers} for parameters with names
+    in 'names' (ordered as in m.parameters) - one methodcaller for each time window"""
+    methods = OrderedDict()
+    parameters = m.parameters
+    for name, par in parameters.items():
+        if name in names:
+            options = {name: optionGet(*option[0]) for name, option in par.options.items()}
+            if batchTime is None:
+                methods[name] = [methodcaller(par.method, startTime = startTime,
+                                              time = time, **options)]
+            elif name not in parameters.noBatch:
+                methods[name] = [methodcaller(par.method, startTime = times[0],
+                                              time = times[1], **options)
+                                 for times in batchTime]
+            else:
+                methods[name] = [methodcaller(par.method, **options)]
+    return methods
+
+
+def processFile(what, file, fileStorage):
+    "returns True if the file should be processed given the option 'what' (e.g. 'only tagged')"
+    if what == "all files":
+        return True
+    elif what == "only tagged":
+        return file in fileStorage.tagged
+    elif what == "only untagged":
+        return file not in fileStorage.tagged
+
+
+def removeReflections(where, file, fileStorage):
+    "returns True if reflections should be removed in the file given the option 'where'"
+    if where == "no files":
+        return False
+    elif where == "tagged files":
+        return file in fileStorage.tagged
+    elif where == "untagged files":
+        return file not in fileStorage.tagged
+    elif where == "all files":
+        return True
+
+
+def outputFile(file):
+    "returns name of the file with results completed with default filetype and directory"
+    if not os.path.splitext(file)[1]:
+        file = file + optionGet("DefProcessOutputFileType", ".txt", "str", True)
+    if not os.path.dirname(file):
+        file = os.path.join(optionGet("ResultDirectory", os.getcwd(), "str", True), file)
+    return file
+
+
+def returnName(filename, allFiles):
+    "depending on option 'SaveFullPath' returns full name of basename"
+    selected = optionGet("SaveFullPath", "Basename", "str", True)
+    if selected == "Unique path":
+        sharedName = os.path.split(os.path.commonprefix(allFiles))[0]
+        return filename[len(sharedName):].lstrip("/\\")
+    elif selected == "Full path":
+        return filename
+    else:
+        return basename(filename)
+
+
+
+class Log():
+    "class representing log of processing"
+    def __init__(self, methods, startTime, stopTime, files, fileStorage, removeReflections,
+                 saveTo, batchTime = None):
+        self.failedToLoad = []
+        self.methods = methods
+        self.methodProblems = {method: [] for method in self.methods}
+        self.startTime = startTime
+        self.stopTime = stopTime
+        self.files = files
+        self.stopped = False
+        self.fileStorage = fileStorage
+        self.removeReflections = removeReflections
+        self.saveTo = saveTo
+        self.batchTime = batchTime
+    
+    def writeLog(self):
+        "writes the log"
+        filepath = optionGet("LogDirectory", os.path.join(os.getcwd(), "Stuff", "Logs"),
+                             "str", True)
+        writeTime = localtime()
+        self.filename = os.path.join(filepath, strftime("%y_%m_%d_%H%M%S", writeTime) + ".txt")
+
+        self.problem = False
+        for method in self.methods:
+            if self.methodProblems[method]:
+                self.problem = True           
+            
+        with open(self.filename, mode = "w") as logfile:
+            logfile.write("CM Manager version " + ".".join(version()) + "\n\n")
+            logfile.write("Task: " + m.fullname[m.mode] + "\n\n")
+            logfile.write("Date: " + strftime("%d %b %Y", writeTime) + "\n")
+            logfile.write("Time: " + strftime("%H:%M:%S", writeTime) + "\n\n\n")
+            self._writeProblems(logfile)
+            self._writeMethods(logfile)
+            self._writeTime(logfile)
+            self._writeSaveIn(logfile)
+            logfile.write("Reflections removed in:\n\t" + self.removeReflections + "\n\n\n")
+            self._writeFiles(logfile)
+            self._writeAddedReflections(logfile)
+
+    def _writeProblems(self, logfile):
+        "writes information about all problems in a logfile"
+        if self.failedToLoad or self.problem or self.stopped:
+            logfile.write("Errors:\n" + "-" * 20 + "\n")
+            if self.stopped:
+                logfile.write("Processing stopped after: " + file + "\n\n")
+            if self.failedToLoad:
+                logfile.write("Failed to load:\n\t")
+                logfile.write("\n\t".join(self.failedToLoad))
+                logfile.write("\n\n")
+            if self.problem:
+                logfile.write("Failed to compute:\n")
+                for method in self.methods:
+                    if self.methodProblems[method]:
+                        logfile.write("\t" + method + ":\n\t\t")
+                        logfile.write("\n\t\t".join(self.methodProblems[method]))
+                        logfile.write("\n")
+                logfile.write("\n")
+            logfile.write("-" * 20 + "\n\n")
+
+    def _writeMethods(self, logfile):
+        "writes information about used methods in a logfile"
+        logfile.write("Methods used:")
+        if self.methods:
+            for method in self.methods:
+                logfile.write("\n\t" + method)
+                if m.parameters[method].options:
+                    for option in m.parameters[method].options.values():
+                        logfile.write("\n\t\t" + option[1] + ": " + str(optionGet(*option[0])))
+        else:
+            logfile.write("\n\tNone")
+        logfile.write("\n\n\n")
+
+    def _writeTime(self, logfile):
+        "writes information about set time in a logfile"
+        logfile.write("Time set:\n")
+        if not self.batchTime:
+            logfile.write("\tStart: " + "{:5.1f}".format(self.startTime) + " minutes\n")
+            logfile.write("\tStop : " + "{:5.1f}".format(self.stopTime) + " minutes\n")
+        else:
+            batchTime = ["{}-{}".format(start, end) for start, end in self.batchTime]
+            logfile.write("\tBatch time [start-end minutes]: " + ", ".join(batchTime) + "\n") 
+        logfile.write("\n\n")
+
+    def _writeSaveIn(self, logfile):
+        "writes information about file where the results were saved in a logfile"
+        file = self.saveTo
+        if not os.path.splitext(file)[1]:
+            file += optionGet("DefProcessOutputFileType", ".txt", "str", True)
+        logfile.write("Results saved in:\n\t" + os.path.abspath(file) + "\n\n\n")
+            
+    def _writeFiles(self, logfile):
+        "writes information about processed files in a logfile"
+        logfile.write("Files processed:")
+        if self.stopped:
+            index = self.files.index(self.stopped)
+            if index == len(self.files):
+                for file in self.files[:index]:
+                    self._writeOneFile(file, logfile)     
+                logfile.write("\nStopped before processing following files:\n\t")
+                for file in self.files[(index + 1):]:
+                    self._writeOneFile(file, logfile)
+            else:
+                for file in self.files:
+                    self._writeOneFile(file, logfile)    
+        else:
+            for file in self.files:
+                self._writeOneFile(file, logfile)   
+
+    def _writeOneFile(self, file, logfile):
+        "writes information about one file in a logfile"
+        logfile.write("\n\t" + file)
+        if file in self.fileStorage.tagged:
+            logfile.write("\tTagged")
+        if self.fileStorage.comments[file]:
+            logfile.write("\n\t\tComment: " + self.fileStorage.comments[file])
+        if file in self.fileStorage.pairedfiles:
+            logfile.write("\n\t\tPaired with: " +
+                          self.fileStorage.pairedfiles[file])
+
+    def _writeAddedReflections(self, logfile):
+        if self.fileStorage.addedReflections and any(self.fileStorage.addedReflections.values()):
+            logfile.write("\n\nAdded reflections:")
+            for file in self.files:
+                if file in self.fileStorage.addedReflections:
+                    if self.fileStorage.addedReflections[file]:
+                        logfile.write("\n\t" + file + "\n\t\t")
+                        added = ",".join(str(p) for p in
+                                         sorted(self.fileStorage.addedReflections[file]))
+                        logfile.write(added)
+
+
+
+def writeResults(file, results):
+    "writes 'results' in a 'file'"
+    if not os.path.splitext(file)[1]:
+        file = file + optionGet("DefProcessOutputFileType", ".txt", "str", True)
+    if not os.path.dirname(file):
+        file = os.path.join(optionGet("ResultDirectory", os.getcwd(), "str", True), file)
+    if os.path.splitext(file)[1] == ".csv":
+        results = [[item for item in line.split(",")] for line in results.split("\n")]
+        with open(file, mode = "w", newline = "") as f:
+            writer = csv.writer(f, dialect = "excel")
+            writer.writerows(results)
+            f.close()    
+    else:
+        outfile = open(file, "w")
+        outfile.write(results)
+        outfile.close()
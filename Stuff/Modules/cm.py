@@ -18,11 +18,35 @@ along with Carousel Maze Manager.  If not, see <http://www.gnu.org/licenses/>.
 """
 
 from math import degrees, atan2, sin, cos, pi, radians, sqrt, ceil
-from collections import deque, OrderedDict, defaultdict
+from collections import deque, OrderedDict, defaultdict, Counter, namedtuple
+from itertools import compress, repeat, islice, accumulate
+from bisect import bisect_left, bisect_right
+from operator import itemgetter, not_, sub, add, mod, floordiv, le, lt, ge
+from array import array
 import os
+import re
 
 
 from funcs import median
+from track import Track
+import diskcache
+import trackcache
+
+
+# linear discriminant used for detection of reflections - a row is classified as a reflection if
+#   absolute * abs(90 - angle) + relative * angle - speed < bound
+# where angle is the change of direction (in degrees) and speed is speed (in cm/s) from the
+# previous row
+Discriminant = namedtuple("Discriminant", ["absolute", "relative", "bound"])
+ReflectionThresholds = namedtuple("ReflectionThresholds", ["problem", "concern"])
+
+defaultThresholds = ReflectionThresholds(problem = Discriminant(7/9, 5/9, -180),
+                                         concern = Discriminant(19/18, 17/18, -155))
+
+# results of all quality controls of a time window (see CM.qualityControl) - reflections are
+# as returned by findReflections with results = "both", outside and badPoints as returned by
+# countOutsidePoints and countBadPoints
+QualityControl = namedtuple("QualityControl", ["reflections", "outside", "badPoints"])
 
 
 
@@ -41,13 +65,14 @@ class CM:
         - sectors: 0 - no, 1 - room, 2 - arena, 3 - both
         - current level is in miliamperes
         - time stamp is in miliseconds
+    the data are stored by columns in self.track (see track.Track), self.data is only a view
+        of the track
     """
-    cache = OrderedDict()
-    
+    reflectionThresholds = defaultThresholds
+
     def __init__(self, nameA, nameR = "auto"):
         "class CM represents data from carousel maze"
         self.nameA = nameA
-        self.data = []
         self.interpolated = set()
         self.indices = slice(7,9)
 
@@ -55,30 +80,44 @@ class CM:
         self._setRoomName(nameR)
         
         # in cache?
-        if (self.nameA, self.nameR) in CM.cache:
-            self.__dict__ = CM.cache[(self.nameA, self.nameR)]
+        cached = trackcache.get(("CM", self.nameA, self.nameR))
+        if cached:
+            self.__dict__ = cached
             return
-     
-        # processing data from room frame    
-        with open(self.nameR, "r") as infile:
-            self._processHeader(infile)
-            self._processRoomFile(infile)
-
-        # processing data from arena frame
-        with open(self.nameA, "r") as infile:
-            self._processArenaFile(infile)
-
-        # discards missing points from beginning of self.data
-        self._correctMissingFromBeginning()
-          
-        # exception used for example when all lines are wrong (all positions are 0, 0)
-        if not self.data:
-            raise Exception("Failure in data initialization.")
+
+        # stored on disk?
+        stamp = diskcache.stamp(self.nameA, self.nameR)
+        stored = diskcache.load("CM", stamp)
+        if stored:
+            self.__dict__ = stored
+        else:
+            # processing data from room frame
+            with open(self.nameR, "r") as infile:
+                self._processHeader(infile)
+                self._processRoomFile(infile)
+
+            # processing data from arena frame
+            with open(self.nameA, "r") as infile:
+                self._processArenaFile(infile)
+
+            # discards missing points from beginning of self.data
+            self._correctMissingFromBeginning()
+
+            # exception used for example when all lines are wrong (all positions are 0, 0)
+            if not self.data:
+                raise Exception("Failure in data initialization.")
+
+            self.stamp = stamp
+            diskcache.save("CM", stamp, self.__dict__)
 
         # caching
-        CM.cache[(self.nameA, self.nameR)] = self.__dict__
-        if len(CM.cache) > 10:
-            CM.cache.popitem(last = False)
+        trackcache.put(("CM", self.nameA, self.nameR), self.__dict__)
+
+
+    @property
+    def data(self):
+        "list-like view of self.track - cm.data[i][j] returns j-th item of i-th row"
+        return self.track.rows
 
         
     def _setRoomName(self, name):
@@ -149,162 +188,295 @@ class CM:
 
 
     def _processRoomFile(self, infile, endsplit = 7):
-        missing = []
-
-        count = -1
-        for line in infile:
-            try:
-                line = self._evaluateLine(line, endsplit)
-                self.data.append(line)
-            except Exception:
-                continue
-    
-            count += 1
-           
-            # missing points
-            if count + 1 != line[0]:
-                i = 1
-                while True:
-                    if self.data[-i][2] or self.data[-i][3]:
-                        break
-                    else:
-                        i += 1
-                        if count + 1 == i:
-                            break
-                if count + 1 != i:
-                    before = self.data[-i][2:4]
-                prev = self.data[-2]
-                number = line[0] - count
-                for row in range(1, number):
-                    timeStamp = ((line[1] - prev[1]) / (number)) * row + prev[1]
-                    filling = [count + 1, timeStamp, 0, 0] + prev[4:]
-                    missing.append(count)
-                    self.interpolated.add(count)
-                    self.data.insert(-1, filling)
-                    count += 1                       
-                                     
-            # wrong points
-            if (line[2] != 0 or line[3] != 0) and missing == []:
-                continue
-            elif line[2] == 0 and line[3] == 0 and missing == []:
-                if count != len(missing):
-                    before = self.data[count - 1][2:4]
-                    missing.append(count)
-                    self.interpolated.add(count)
-                else:
-                    before = []
-                    missing.append(count)
-                    self.interpolated.add(count)
-            elif line[2] == 0 and line[3] == 0 and missing != []:
-                missing.append(count)
-                self.interpolated.add(count)
-            elif (line[2] != 0 or line[3] != 0) and missing != []:
-                after = line[2:4]
-                if before != []:
-                    for missCounter, missLines in enumerate(missing, start=1):
-                        self.data[missLines][2] = ((after[0] - before[0]) / (len(missing) + 1)) \
-                                                  * missCounter + before[0]
-                        self.data[missLines][3] = ((after[1] - before[1]) / (len(missing) + 1)) \
-                                                  * missCounter + before[1]
-                missing = []
-        
-        if missing != [] and before:
-            for missLines in missing:
-                self.data[missLines][2:4] = before
-
+        """loads data from the rest of the file to self.track
+            - rows of missing frames are inserted (their time stamps are interpolated and their
+                positions are treated as wrong points)
+            - wrong points (0, 0) are interpolated between the nearest correct points
+        """
+        columns = self._readColumns(infile, endsplit)
+        times = columns[1]
+        track = Track(len(columns))
+
+        # missing frames
+        gaps = []
+        previous = 0
+        for line, count, number in self._findGaps(columns[0]):
+            if not line:
+                raise Exception("Failure in data initialization.")
+            missed = max(number - 1, 0)
+            if missed:
+                for column, values in zip(track.columns, columns):
+                    column.extend(values[previous:line])
+                prev = line - 1
+                step = (times[line] - times[prev]) / number
+                track.frame.extend(range(count + 1, count + number))
+                track.time.extend([step * row + times[prev] for row in range(1, number)])
+                for column in track.columns[2:4]:
+                    column.extend(repeat(0, missed))
+                for column, values in zip(track.columns[4:], columns[4:]):
+                    column.extend(repeat(values[prev], missed))
+                previous = line
+            gaps.append((count + missed, missed))
+        if previous:
+            for column, values in zip(track.columns, columns):
+                column.extend(values[previous:])
+        else:
+            # no frames are missing - the columns are used without copying
+            track.columns = columns
+        self.track = track
 
-    def _evaluateLine(self, line, endsplit):
-        return list(map(int, line.replace("*", "0").split()[:endsplit]))
+        # wrong points
+        xs, ys = track.columns[2:4]
+        missing, before = self._interpolateWrongPoints(xs, ys, gaps, roomFile = True)
+        if missing is not None and before is not None:
+            xs[missing:] = array("d", [before[0]]) * (len(xs) - missing)
+            ys[missing:] = array("d", [before[1]]) * (len(ys) - missing)
 
 
     def _processArenaFile(self, infile):
+        """adds data from the arena frame file to self.track (see _processRoomFile)
+            - rows of the room frame which are not in the arena frame file are discarded
+        """
         for line in infile:
             if line.count("END_HEADER") > 0:
                 break
 
-        missing = []
+        columns = self._readColumns(infile, 7)
+        if len(columns) != 7:
+            raise Exception("Failure in data initialization.")
+        length = len(self.track)
+        arena = Track().columns[7:]
+
+        def add(start, end):
+            for column, values in zip(arena, columns[2:]):
+                column.extend(values[start:end])
+
+        # missing frames
+        gaps = []
+        previous = 0
+        for line, count, number in self._findGaps(columns[0]):
+            add(previous, line)
+            previous = line
+            if count > length:
+                break
+            if not count:
+                raise Exception("Failure in data initialization.")
+            missed = max(number - 1, 0)
+            if missed:
+                if count + missed > length:
+                    raise Exception("Failure in data initialization.")
+                for column in arena[0:2]:
+                    column.extend(repeat(0, missed))
+                for column in arena[2:]:
+                    column.extend(repeat(column[max(count - 2, 0)], missed))
+            gaps.append((count + missed, missed))
+            if count + missed == length:
+                break
+            add(line, line + 1)
+            previous = line + 1
+        else:
+            add(previous, None)
+        for column in arena:
+            del column[length:]
+
+        # wrong points
+        xs, ys = arena[0:2]
+        missing, before = self._interpolateWrongPoints(xs, ys, gaps, roomFile = False)
 
-        count = -1
-        for line in infile:
+        # in case of different lengths of arena and room frame files
+        if len(xs) < length:
+            count = len(xs) - 1
+            if count < 0 or missing is not None:
+                raise Exception("Failure in data initialization.")
+            self.track.truncate(count)
+            for column in arena:
+                del column[count:]
+
+        if missing is not None:
+            if before is None:
+                raise Exception("Failure in data initialization.")
+            xs[missing:] = array("d", [before[0]]) * (len(xs) - missing)
+            ys[missing:] = array("d", [before[1]]) * (len(ys) - missing)
+
+        self.track.columns.extend(arena)
+
+
+    def _readColumns(self, infile, endsplit, blockSize = 1024):
+        "returns columns of data in the rest of the file (see track.Track and _readBlocks)"
+        columns = Track(endsplit).columns
+        for values in self._readBlocks(infile, endsplit, blockSize):
+            if not len(columns[0]):
+                columns = values
+            elif len(values) != len(columns):
+                raise Exception("Failure in data initialization.")
+            else:
+                for column, new in zip(columns, values):
+                    column.extend(new)
+        return columns
+
+
+    def _readBlocks(self, infile, endsplit, blockSize = 1024):
+        """yields columns of data in consecutive blocks of 'blockSize' lines of the rest of the
+            file - only one block of the text is kept in memory
+            - lines are evaluated in blocks by _evaluateColumns, if it is not possible for
+                a block, its lines are evaluated one by one and lines which cannot be
+                evaluated are skipped
+        """
+        while True:
+            block = "".join(islice(infile, blockSize))
+            if not block:
+                return
+            block = block.split("\n")
+            if not block[-1]:
+                block.pop()
             try:
-                line = self._evaluateLine(line, 7)
+                values = self._evaluateColumns(block, endsplit)
             except Exception:
-                continue
+                rows = []
+                for line in block:
+                    try:
+                        rows.append(self._evaluateLine(line, endsplit))
+                    except Exception:
+                        continue
+                if not rows:
+                    continue
+                values = Track.fromRows(rows).columns
+            yield values
+
+
+    def _splitColumns(self, lines, endsplit = None):
+        "returns columns of items in lines - all lines have to contain the same number of items"
+        rows = list(map(str.split, lines))
+        widths = set(map(len, rows))
+        if len(widths) != 1 or 0 in widths:
+            raise ValueError("lines contain different numbers of items")
+        width = widths.pop()
+        return [list(map(itemgetter(i), rows)) for i in range(min(width, endsplit or width))]
+
+
+    def _evaluateColumns(self, lines, endsplit):
+        "evaluates a block of lines at once - the result is the same as from _evaluateLine"
+        lines = [line.replace("*", "0") for line in lines]
+        return [array(code, list(map(int, column))) for code, column in
+                zip(Track.typecodes, self._splitColumns(lines, endsplit))]
 
-            count += 1
-            
-            # missing points
-            if count + 1 != line[0]:
-                i = 1
-                while True:
-                    if self.data[count - i][7] or self.data[count - i][8]:
-                        break
-                    else:
-                        i += 1
-                        if count + 1 == i:
-                            break
-                if count + 1 != i:
-                    before = self.data[count - i][7:9]
-                prev = self.data[count - 2][9:]
-                number = line[0] - count
-                for row in range(1, number):
-                    filling = [0, 0] + prev
-                    missing.append(count)
-                    self.interpolated.add(count)
-                    self.data[count] += filling
-                    count += 1
-
-            try:          
-                self.data[count] += line[2:]
-            # in case of different lengths of arena and room frame files
-            except IndexError:
-                break 
-            
-            # wrong points
-            if (line[2] != 0 or line[3] != 0) and missing == []:
-                 continue
-            elif line[2] == 0 and line[3] == 0 and missing == []:
-                if count != len(missing):
-                    before = self.data[count - 1][7:9]
-                    missing.append(count)
-                    self.interpolated.add(count)
+
+    def _evaluateLine(self, line, endsplit):
+        return list(map(int, line.replace("*", "0").split()[:endsplit]))
+
+
+    def _findGaps(self, frames):
+        """returns (line, count, number) for each line whose frame number does not follow
+            from the previous lines
+            - count is the index of the line in data before the missing frames are added
+            - number - 1 is the number of missing frames (number is less than 1 when frames
+                are repeated)
+        """
+        if not frames:
+            return []
+        irregular = bytes([frames[0] != 1]) + bytes(map((1).__ne__, map(sub, frames[1:], frames)))
+        gaps = []
+        count = -1
+        previous = -1
+        line = irregular.find(1)
+        while line != -1:
+            count += line - previous
+            number = frames[line] - count
+            if number != 1:
+                gaps.append((line, count, number))
+                count += max(number - 1, 0)
+            previous = line
+            if count + 1 == frames[line]:
+                line = irregular.find(1, line + 1)
+            else:
+                # following lines do not correspond to frames numbers
+                line = line + 1 if line + 1 < len(frames) else -1
+        return gaps
+
+
+    def _interpolateWrongPoints(self, xs, ys, gaps, roomFile = True):
+        """interpolates wrong points (0, 0) linearly between the nearest correct points,
+            positions in missing frames are treated as wrong points
+            - xs, ys are arrays of positions which are changed in place
+            - gaps contains (index of a row following missing frames, number of missing frames)
+                for each gap in frames
+            - returns index of the first of wrong points at the end of data, which cannot be
+                interpolated (or None), and the last correct position before them
+        """
+        length = len(xs)
+        correct = bytes(map(any, zip(xs, ys)))
+        self.interpolated.update(compress(range(length), map(not_, correct)))
+
+        gaps = iter(gaps + [(length + 1, 0)])
+        gap, missed = next(gaps)
+        before = None
+        missing = None
+        position = 0
+        while True:
+            if missing is None:
+                row = correct.find(0, position)
+            else:
+                row = correct.find(1, position)
+            if row == -1:
+                row = length
+
+            if gap - missed <= row:
+                # the last correct position before the gap is used
+                if roomFile and gap < length and correct[gap]:
+                    before = (xs[gap], ys[gap])
                 else:
-                    before = []
-                    missing.append(count)
-                    self.interpolated.add(count)
-            elif line[2] == 0 and line[3] == 0 and missing != []:
-                missing.append(count)
-                self.interpolated.add(count)
-            elif (line[2] != 0 or line[3] != 0) and missing != []:
-                after = line[2:4]
-                if before != []:
-                    for missCounter, missLines in enumerate(missing, start=1):
-                        self.data[missLines][7] = ((after[0] - before[0]) / (len(missing) + 1)) \
-                                                  * missCounter + before[0]
-                        self.data[missLines][8] = ((after[1] - before[1]) / (len(missing) + 1)) \
-                                                  * missCounter + before[1]
-                missing = []
+                    index = gap - missed - 1 if missing is None else missing - 1
+                    lowest = 1 if roomFile else 0
+                    while index >= lowest and not (xs[index] or ys[index]):
+                        index -= 1
+                    if index >= lowest:
+                        before = (xs[index], ys[index])
+                if missed and missing is None:
+                    missing = gap - missed
+                if gap >= length:
+                    break
+                if not correct[gap]:
+                    if missing is None:
+                        before = (xs[gap - 1], ys[gap - 1]) if gap else None
+                        missing = gap
+                elif missing is not None:
+                    self._interpolatePositions(xs, ys, missing, gap, before)
+                    missing = None
+                position = gap + 1
+                gap, missed = next(gaps)
+            elif row == length:
+                break
+            elif missing is None:
+                before = (xs[row - 1], ys[row - 1]) if row else None
+                missing = row
+                position = row + 1
+            else:
+                self._interpolatePositions(xs, ys, missing, row, before)
+                missing = None
+                position = row + 1
 
-        # in case of different lengths of arena and room frame files
-        if count != len(self.data) - 1:
-            self.data = self.data[:count]
-        
-        if missing != []:
-            for missLines in missing:
-                self.data[missLines][7:9] = before
+        return missing, before
+
+
+    def _interpolatePositions(self, xs, ys, start, end, before):
+        "interpolates positions in rows start, ..., end - 1 between 'before' and the row end"
+        if before is None:
+            return
+        number = end - start + 1
+        for positions, last, after in zip((xs, ys), before, (xs[end], ys[end])):
+            step = (after - last) / number
+            positions[start:end] = array("d", [step * row + last for row in range(1, number)])
 
 
     def _correctMissingFromBeginning(self):
         beginMiss = 0
         
-        for line in self.data:
-            if (line[2] == 0 and line[3] == 0) or (line[7] == 0 and line[8] == 0):
+        for x, y, ax, ay in zip(*self.track.columns[2:4] + self.track.columns[7:9]):
+            if (x == 0 and y == 0) or (ax == 0 and ay == 0):
                 beginMiss += 1
             else:
                 if beginMiss != 0:
-                    self.data = self.data[beginMiss:]
-                    for i in range(len(self.data)):
-                        self.data[i][0] -= beginMiss
+                    self.track.discard(beginMiss)
                     self.interpolated = {p - beginMiss for p in self.interpolated}
                 break
            
@@ -328,16 +500,24 @@ class CM:
         argument 'time' is time of the session,
         """
         dist = 0
+        start, stop = self.findWindow(startTime, time)
         time = time * 60000 # conversion from minutes to miliseconds
-        start = self.findStart(startTime)
-        x0, y0 = self.data[start][self.indices] 
-        for content in self.data[(start + skip)::skip]:
-            if content[1] <= time:
-                x1, y1 = content[self.indices]
-                diff = ((x1 - x0)**2 + (y1 - y0)**2)**0.5
-                if diff > minDifference:
-                    dist += diff
-                x0, y0 = x1, y1
+        xs, ys = self.track.columns[self.indices]
+        x0, y0 = xs[start], ys[start]
+        if self._sortedTime():
+            cumulative = self._distanceIndex(skip, minDifference, start % skip)
+            first = start // skip
+            last = (stop - 1 - start % skip) // skip
+            if last > first:
+                dist = cumulative[last] - cumulative[first]
+        else:
+            rows = slice(start + skip, stop, skip)
+            for t, x1, y1 in zip(self.track.time[rows], xs[rows], ys[rows]):
+                if t <= time:
+                    diff = ((x1 - x0)**2 + (y1 - y0)**2)**0.5
+                    if diff > minDifference:
+                        dist += diff
+                    x0, y0 = x1, y1
         dist = dist / (self.trackerResolution * 100) # conversion from pixels to metres
         return format(dist, "0.2f")
 
@@ -350,28 +530,30 @@ class CM:
         """
         maxT = 0
         prev = 0
-        start = self.findStart(startTime)
+        start, stop = self.findWindow(startTime, time)
         timePrev = startTime * 60000
         time = time * 60000 # conversion from minutes to miliseconds
-        for content in self.data[start:]:
-            if content[self.shockIndex] != 2 and prev != 2 and content[1] <= time:
+        track = self.track
+        for state, state5, t in zip(track.columns[self.shockIndex][start:stop],
+                                    track.columns[5][start:stop], track.time[start:stop]):
+            if state != 2 and prev != 2 and t <= time:
                 continue
-            elif content[self.shockIndex] != 2 and prev == 2 and content[1] <= time:
-                if content[self.shockIndex] == 4 or content[self.shockIndex] == 0:
-                    prev = content[5]
-                    timePrev = content[1]
+            elif state != 2 and prev == 2 and t <= time:
+                if state == 4 or state == 0:
+                    prev = state5
+                    timePrev = t
                 continue
-            elif content[self.shockIndex] == 2 and prev == 2 and content[1] <= time:
+            elif state == 2 and prev == 2 and t <= time:
                 continue
-            elif content[self.shockIndex] == 2 and prev != 2 and content[1] <= time:
-                maxT = max(content[1] - timePrev, maxT)
+            elif state == 2 and prev != 2 and t <= time:
+                maxT = max(t - timePrev, maxT)
                 prev = 2
                 continue
-            elif content[1] > time:
-                finalTime = content[1]
+            elif t > time:
+                finalTime = t
                 break
         else:
-            finalTime = self.data[-1][1]
+            finalTime = track.time[stop] if stop < len(track) else track.time[-1]
 
         if lastTime == "fromData": # not used - may be added as an option in the future
             maxT = max(min(finalTime - timePrev, time - startTime), maxT)
@@ -388,20 +570,21 @@ class CM:
         argument 'lastTime' decides whether the last time point is obtained from 'time' parameter
             or data
         """
-        start = self.findStart(startTime)
+        start, stop = self.findWindow(startTime, time)
         time *= 60000 # conversion from minutes to miliseconds
         startTime *= 60000
         T1 = 0
-        for content in self.data[start:]:
-            if content[self.shockIndex] != 2:
+        for state, t in zip(self.track.columns[self.shockIndex][start:stop],
+                            self.track.time[start:stop]):
+            if state != 2:
                 continue
-            elif content[self.shockIndex] == 2:
-                T1 = content[1] - startTime
+            elif state == 2:
+                T1 = t - startTime
                 break
             
         if T1 == 0 or T1 > time - startTime:
             if lastTime == "fromData": # not used - may be added as an option in the future
-                T1 = min(time, self.data[-1][1]) - startTime
+                T1 = min(time, self.track.time[-1]) - startTime
             elif lastTime == "fromParameter":
                 T1 = time - startTime
                 
@@ -413,24 +596,29 @@ class CM:
         """computes number of shocks,
         argument 'time' is time of the session
         """
+        start, stop = self.findWindow(startTime, time)
         time = time * 60000 # conversion from minutes to miliseconds
-        start = self.findStart(startTime)
+        if not indices and self._sortedTime():
+            return self._countEvents("shocks", self.shockIndex, start, stop)
         shocks = []
         prev = 0
-        for content in self.data[start:]:
-            if content[self.shockIndex] != 2 and prev != 2 and content[1] <= time:
+        track = self.track
+        for frame, state, t in zip(track.frame[start:stop],
+                                   track.columns[self.shockIndex][start:stop],
+                                   track.time[start:stop]):
+            if state != 2 and prev != 2 and t <= time:
                 continue
-            elif content[self.shockIndex] != 2 and prev == 2 and content[1] <= time:
-                if content[self.shockIndex] != 5:
-                    prev = content[self.shockIndex]
+            elif state != 2 and prev == 2 and t <= time:
+                if state != 5:
+                    prev = state
                 continue
-            elif content[self.shockIndex] == 2 and prev == 2 and content[1] <= time:
+            elif state == 2 and prev == 2 and t <= time:
                 continue
-            elif content[self.shockIndex] == 2 and prev != 2 and content[1] <= time:
-                shocks.append(content[0])
+            elif state == 2 and prev != 2 and t <= time:
+                shocks.append(frame)
                 prev = 2
                 continue
-            elif content[1] > time:
+            elif t > time:
                 break
 
         if indices:
@@ -443,24 +631,27 @@ class CM:
         """computes number of entrances,
         argument 'time' is time of the session
         """
+        start, stop = self.findWindow(startTime, time)
         time = time * 60000 # conversion from minutes to miliseconds
-        start = self.findStart(startTime)
+        if self._sortedTime():
+            return self._countEvents("entrances", self.shockIndex, start, stop)
         entrances = 0
         prev = 0
-        for content in self.data[start:]:
-            if content[self.shockIndex] != 2 and prev != 2 and content[1] <= time:
+        for state, t in zip(self.track.columns[self.shockIndex][start:stop],
+                            self.track.time[start:stop]):
+            if state != 2 and prev != 2 and t <= time:
                 continue
-            elif content[self.shockIndex] != 2 and prev == 2 and content[1] <= time:
-                if content[self.shockIndex] == 0: 
+            elif state != 2 and prev == 2 and t <= time:
+                if state == 0: 
                     prev = 0
                 continue
-            elif content[self.shockIndex] == 2 and prev == 2 and content[1] <= time:
+            elif state == 2 and prev == 2 and t <= time:
                 continue
-            elif content[self.shockIndex] == 2 and prev != 2 and content[1] <= time:
+            elif state == 2 and prev != 2 and t <= time:
                 entrances += 1
                 prev = 2
                 continue
-            elif content[1] > time:
+            elif t > time:
                 break
         return entrances
 
@@ -476,19 +667,10 @@ class CM:
         time = time * 60000
         start = self.findStart(startTime)
         
-        periphery = 0
-        center = 0
-        
-        for content in self.data[start:]:
-            if content[1] <= time:
-                x, y = content[self.indices]
-                distance = sqrt((x - self.centerX)**2 + (y - self.centerY)**2)
-                if distance >= border:
-                    periphery += 1
-                else:
-                    center += 1
+        distances = list(self._window(self._derived("distance"), start, time))
+        periphery = sum(map(ge, distances, repeat(border)))
 
-        return format(periphery / (center + periphery), "0.3f")
+        return format(periphery / len(distances), "0.3f")
 
 
     def getAngleBoxes(self, time = 20, startTime = 0, width = "default", results = "condensed",
@@ -517,11 +699,13 @@ class CM:
                 sectorCenterAngle = center
   
         angles = [0] * ceil(360 / width)
-        for content in self.data[start:]:
-            if content[1] <= time:
-                angle = (degrees(self._angle(*content[indices])) - sectorCenterAngle +
-                         (width / 2) + 360) % 360
-                angles[int(angle // width)] += 1
+        selected = self._window(self._derived("degrees", indices), start, time)
+        # (angle - sectorCenterAngle + (width / 2) + 360) % 360 // width for each angle
+        shifted = map(add, map(add, map(sub, selected, repeat(sectorCenterAngle)),
+                               repeat(width / 2)), repeat(360))
+        for box, count in Counter(map(floordiv, map(mod, shifted, repeat(360)),
+                                      repeat(width))).items():
+            angles[int(box)] += count
 
         boxes = [format((box / sum(angles)), "0.3f") for box in angles]
 
@@ -557,15 +741,162 @@ class CM:
         return atan2(self.centerY - y, x - self.centerX + 0.000000001)
 
 
+    def _derived(self, name, indices = None):
+        """returns column computed from positions in columns given by 'indices' (self.indices
+        by default), computed columns are stored in the track so that all parameters and time
+        windows use them - possible names are:
+            'angle' - angle relative to center in radians (see _angle)
+            'degrees', 'sin', 'cos' - the angle in degrees, its sine and cosine
+            'distance' - distance from center
+        """
+        if indices is None:
+            indices = self.indices
+        key = (name, indices.start)
+        derived = self.track.derived
+        if key not in derived:
+            if name == "angle":
+                xs, ys = self.track.columns[indices]
+                column = map(self._angle, xs, ys)
+            elif name == "degrees":
+                column = map(degrees, self._derived("angle", indices))
+            elif name == "sin":
+                column = map(sin, self._derived("angle", indices))
+            elif name == "cos":
+                column = map(cos, self._derived("angle", indices))
+            elif name == "distance":
+                xs, ys = self.track.columns[indices]
+                cx, cy = self.centerX, self.centerY
+                column = [sqrt((x - cx)**2 + (y - cy)**2) for x, y in zip(xs, ys)]
+            derived[key] = array("d", column)
+        return derived[key]
+
+
+    def _window(self, column, start, time, strict = False):
+        """returns values of a column from the row 'start' in rows with time stamp smaller or
+        equal to 'time' (in miliseconds) - or only smaller if 'strict' is True"""
+        if self._sortedTime():
+            # the selected rows are all rows from start until the time is reached
+            return column[start:self._stop(start, time, strict)]
+        times = self.track.time[start:]
+        return compress(column[start:], map(lt if strict else le, times, repeat(time)))
+
+
+    def _sortedTime(self):
+        "returns True if time stamps do not decrease - the indices below can be used only then"
+        derived = self.track.derived
+        if "sorted" not in derived:
+            times = self.track.time
+            derived["sorted"] = all(map(le, times, islice(times, 1, None)))
+        return derived["sorted"]
+
+
+    def _stop(self, start, time, strict = False):
+        """returns the first row after 'start' with time stamp larger than 'time' (in
+        miliseconds) - or larger or equal if 'strict' is True; time stamps have to be sorted"""
+        return (bisect_left if strict else bisect_right)(self.track.time, time, start)
+
+
+    def _distanceIndex(self, skip, minDifference, first):
+        """returns cumulative distance travelled between every 'skip'-th row starting from row
+        'first' (as computed by getDistance) - i-th item is the distance from the row 'first' to
+        the row 'first' + i * skip"""
+        key = ("distance index", self.indices.start, skip, minDifference, first)
+        derived = self.track.derived
+        if key not in derived:
+            xs, ys = self.track.columns[self.indices]
+            xs, ys = xs[first::skip], ys[first::skip]
+            steps = [((x1 - x0)**2 + (y1 - y0)**2)**0.5 for x0, y0, x1, y1 in
+                     zip(xs, ys, islice(xs, 1, None), islice(ys, 1, None))]
+            derived[key] = array("d", accumulate([0] + [step if step > minDifference else 0
+                                                        for step in steps]))
+        return derived[key]
+
+
+    def _eventIndex(self, kind, column):
+        """returns index of entrances or shocks (according to 'kind') in a column of states,
+        which is used to count them in any time window (see _countEvents)
+            starts - rows with entrances (shocks) when the whole track is processed
+            ends - rows where the shock zone is left after each of the entrances (shocks)
+            codes - states coded as bytes: E for 2, L for states which end a stay in the zone
+                and N for others
+        """
+        key = (kind, column)
+        derived = self.track.derived
+        if key not in derived:
+            if kind == "entrances":
+                coding = lambda state: "E" if state == 2 else "L" if state == 0 else "N"
+            elif kind == "shocks":
+                coding = lambda state: "E" if state == 2 else "N" if state == 5 else "L"
+            states = self.track.columns[column]
+            if not states or 0 <= min(states) and max(states) < 256:
+                table = "".join(map(coding, range(256))).encode("ascii")
+                codes = bytes(iter(states)).translate(table)
+            else:
+                codes = "".join(map(coding, states)).encode("ascii")
+            # a zone is entered when E follows L (or the beginning) with only N in between
+            starts = array("l", [match.start(1) for match in
+                                 re.finditer(rb"(?:^|L)N*(E)", codes)])
+            ends = array("l", [codes.find(b"L", start) % (len(codes) + 1) for start in starts])
+            derived[key] = (starts, ends, codes)
+        return derived[key]
+
+
+    def _countEvents(self, kind, column, start, stop):
+        "returns number of entrances or shocks in rows between 'start' and 'stop'"
+        starts, ends, codes = self._eventIndex(kind, column)
+        number = bisect_left(starts, stop) - bisect_left(starts, start)
+        last = bisect_left(starts, start) - 1
+        if start < stop and last >= 0 and ends[last] >= start:
+            # counting starts outside of the shock zone - the zone is entered once more if the
+            # first change after start is an entrance
+            change = re.compile(rb"[EL]").search(codes, start)
+            if change and change.start() < stop and codes[change.start()] == ord("E"):
+                number += 1
+        return number
+
+
+    def _badPointsIndex(self):
+        "returns number of interpolated rows before each row"
+        derived = self.track.derived
+        if "bad points" not in derived:
+            bad = map(self.interpolated.__contains__, self.track.frame)
+            derived["bad points"] = array("l", accumulate(bad, initial = 0))
+        return derived["bad points"]
+
+
+    def _outsideIndex(self, distance):
+        "returns number of rows outside of the arena (see _outside) before each row"
+        key = ("outside", self.indices.start, distance)
+        derived = self.track.derived
+        if key not in derived:
+            derived[key] = array("l", accumulate(self._outside(distance), initial = 0))
+        return derived[key]
+
+
+    def _outside(self, distance):
+        "returns for each row whether the position is farther than 'distance' from the arena"
+        cx, cy = self.centerX, self.centerY
+        limit = self.radius + distance
+        xs, ys = self.track.columns[self.indices]
+        return (((x - cx)**2 + (y - cy)**2)**0.5 > limit for x, y in zip(xs, ys))
+
+
+    def _windowCount(self, index, start, stop, time):
+        """returns number of rows counted in 'index' (as returned by _badPointsIndex) between
+        rows 'start' and 'stop' with time stamp smaller or equal to 'time' (in miliseconds)"""
+        if self._sortedTime():
+            return index[stop] - index[start]
+        counted = map(sub, islice(index, start + 1, stop + 1), islice(index, start, stop))
+        return sum(compress(counted, map(le, self.track.time[start:stop], repeat(time))))
+
+
     def getDirectionalMean(self, time = 20, startTime = 0, indices = slice(2,4)):
         "returns directional mean angle in room frame"
         time = time * 60000
         start = self.findStart(startTime)
 
-        num = sum([sin(self._angle(*content[indices])) for content in self.data[start:] if
-                   content[1] < time])
-        den = sum([cos(self._angle(*content[indices])) for content in self.data[start:] if
-                   content[1] < time])
+        num = sum(self._window(self._derived("sin", indices), start, time, strict = True))
+        den = sum(self._window(self._derived("cos", indices), start, time, strict = True))
 
         if den == 0:
             den = 0.000000001
@@ -582,10 +913,10 @@ class CM:
         time = time * 60000
         start = self.findStart(startTime)
 
-        R = sum([cos(self._angle(*content[indices]) - circMean) for content in
-                 self.data[start:] if content[1] < time])
+        angles = list(self._window(self._derived("angle", indices), start, time, strict = True))
+        R = sum(map(cos, map(sub, angles, repeat(circMean))))
         
-        circVar = 1 - R / len([1 for content in self.data[start:] if content[1] < time])
+        circVar = 1 - R / len(angles)
 
         return format(circVar, "0.2f")
 
@@ -594,21 +925,21 @@ class CM:
                                smooth = 2, forGraph = False):
         """returns maximum continuous time that the rat was immobile
             minSpeed argument is in cm/s, smooth and skip are represented in data points"""
+        start, stop = self.findWindow(startTime, time)
         time = time * 60000
-        start = self.findStart(startTime)
         t0 = startTime * 60000
-        x0, y0 = self.data[start][self.indices]
+        xs, ys = self.track.columns[self.indices]
+        x0, y0 = xs[start], ys[start]
         speeds = deque()
 
         prev = t0
         maxIm = 0
         immobility = []
-        
-        for content in self.data[start+skip::skip]:
-            if content[1] > time:
+
+        rows = slice(start + skip, stop, skip)
+        for t1, x1, y1 in zip(self.track.time[rows], xs[rows], ys[rows]):
+            if t1 > time:
                 break
-            x1, y1 = content[self.indices]
-            t1 = content[1]
             speeds.append((sqrt(((x1 - x0)**2 + (y1 - y0)**2)) / self.trackerResolution) /
                           ((t1 - t0) / 1000))
 
@@ -641,8 +972,8 @@ class CM:
                 the task properly
             // minTime may be a list of values
         """
+        start, stop = self.findWindow(startTime, time)
         time = time * 60000
-        start = self.findStart(startTime)
                 
         result = []
         
@@ -650,20 +981,20 @@ class CM:
             minTime = [minTime]
 
         moves = []
+        xs, ys = self.track.columns[self.indices]
+        rows = slice(start + skip, stop, skip)
             
         for minT in minTime:
             t0 = startTime * 60000
-            x0, y0 = self.data[start][self.indices]
+            x0, y0 = xs[start], ys[start]
             minT *= 1000
             speeds = deque()
         
             prev = False
             periods = []
-            for content in self.data[start+skip::skip]:
-                if content[1] > time:
+            for t1, x1, y1 in zip(self.track.time[rows], xs[rows], ys[rows]):
+                if t1 > time:
                     break
-                x1, y1 = content[self.indices]
-                t1 = content[1]
                 speeds.append((sqrt(((x1 - x0)**2 + (y1 - y0)**2)) / self.trackerResolution) /
                               ((t1 - t0) / 1000))
 
@@ -694,20 +1025,20 @@ class CM:
     def getPercentOfMobility(self, time = 20, startTime = 0, minSpeed = 5, skip = 12, smooth = 2):
         """returns proportion of time that the rat was moving
             minSpeed argument is in cm/s, smooth and skip are represented in data points"""
+        start, stop = self.findWindow(startTime, time)
         time = time * 60000
-        start = self.findStart(startTime)
         t0 = startTime * 60000
-        x0, y0 = self.data[start][self.indices]
+        xs, ys = self.track.columns[self.indices]
+        x0, y0 = xs[start], ys[start]
         speeds = deque()
 
         mobile = 0
         immobile = 0
-        
-        for content in self.data[start+skip::skip]:
-            if content[1] > time:
+
+        rows = slice(start + skip, stop, skip)
+        for t1, x1, y1 in zip(self.track.time[rows], xs[rows], ys[rows]):
+            if t1 > time:
                 break
-            x1, y1 = content[self.indices]
-            t1 = content[1]
             speeds.append((sqrt(((x1 - x0)**2 + (y1 - y0)**2)) / self.trackerResolution) /
                           ((t1 - t0) / 1000))
             x0, y0, t0 = x1, y1, t1
@@ -730,9 +1061,7 @@ class CM:
         time = time * 60000
         start = self.findStart(startTime)
 
-        distances = [sqrt((content[self.indices][0] - self.centerX)**2 +
-                          (content[self.indices][1] - self.centerY)**2)
-                     for content in self.data[start:] if content[1] < time]
+        distances = list(self._window(self._derived("distance"), start, time, strict = True))
         result = (sum(distances) / self.trackerResolution) / len(distances)
 
         return format(result, "0.2f")
@@ -740,11 +1069,14 @@ class CM:
 
     def getSpeedAfterShock(self, time = 20, startTime = 0, after = 25, absolute = False):
         "returns direction that the rat travelled 'after' points after shock"
+        start, stop = self.findWindow(startTime, time, strict = True)
         time = time * 60000
-        start = self.findStart(startTime)
 
-        shocks = [content[0] for content in self.data[start:] if
-                  content[self.shockIndex] == 2 and content[1] < time]
+        track = self.track
+        shocks = [frame for frame, state, t in zip(track.frame[start:stop],
+                                                   track.columns[self.shockIndex][start:stop],
+                                                   track.time[start:stop]) if
+                  state == 2 and t < time]
         if shocks:
             selected = [shocks[0]]
             prev = shocks[0]
@@ -757,11 +1089,12 @@ class CM:
 
         angles = []
         cx, cy = self.centerX, self.centerY
+        xs, ys = track.columns[self.indices]
         for shock in selected:
-            x1, y1 = self.data[shock][self.indices]
-            if len(self.data) <= shock + after:
+            x1, y1 = xs[shock], ys[shock]
+            if len(track) <= shock + after:
                 break
-            x2, y2 = self.data[shock + after][self.indices]
+            x2, y2 = xs[shock + after], ys[shock + after]
             angle = ((degrees(atan2(x2 - cx, y2 - cy + 0.0000001)) -
                       degrees(atan2(x1 - cx, y1 - cy + 0.0000001)) + 180) % 360) - 180
             angles.append(angle)
@@ -778,61 +1111,70 @@ class CM:
         return reflections[0] + reflections[1]
         
 
-    def findReflections(self, time = 20, startTime = 0, results = "both"):
+    def findReflections(self, time = 20, startTime = 0, results = "both", thresholds = None):
         """finds possible reflections and returns either number of possible reflection points
         or their indices - which is true depends on 'results' argument ('summary' for the former
         and 'indices' for the latter)"
-        both possible results are returned divided into points of concern and problematic points        
+        both possible results are returned divided into points of concern and problematic points
+            - thresholds are ReflectionThresholds (self.reflectionThresholds by default)
         """
         if time == "max":
-            time = self.data[-1][1]
+            time = self.track.time[-1]
         else:
             time = time * 60000
         startTime = startTime * 60000
 
-        x0, y0 = self.data[0][self.indices]
-        x1, y1 = self.data[1][self.indices]
-        t1 = self.data[1][1]
-        angle1 = degrees(atan2(x1 - x0, y1 - y0 + 0.0000001)) + 180
-
-        #reflectionInfo = []
-        problem = []
-        concern = []
-        problemNum = 0
-        concernNum = 0
-
-        for content in self.data[2:]:
-            x2, y2 = content[self.indices]
-            t2 = content[1]
-            angle2 = degrees(atan2(x2 - x1, y2 - y1 + 0.0000001)) + 180
-
-            speed = ((x2 - x1)**2 + (y2 - y1)**2)**0.5 / \
-                    (self.trackerResolution * (t2 - t1) / 1000)
-
-            angleDif = 180 - abs(abs(angle2 - angle1) - 180)
-
-            info = (content[0], speed, angleDif) # speed (cm/s), angleDif (degrees)
-                        
-            if ((7/9) * abs(90 - info[2]) + (5/9) * info[2] - info[1]) < -180:
-                problem.append(info[0])
-                if startTime <= content[1] <= time:
-                    problemNum += 1
-            elif ((19/18) * abs(90 - info[2]) + (17/18) * info[2] - info[1]) < -155:
-                concern.append(info[0])
-                if startTime <= content[1] <= time:
-                    concernNum += 1
-
-            x0, y0 = x1, y1 # to tu asi neni potreba
-            x1, y1 = x2, y2
-            t1 = t2
-            angle1 = angle2
+        thresholds = thresholds or self.reflectionThresholds
+        concern, concernTimes, problem, problemTimes = self._reflections(thresholds)
+        if results == "summary" or results == "both":
+            concernNum = sum(startTime <= t <= time for t in concernTimes)
+            problemNum = sum(startTime <= t <= time for t in problemTimes)
 
         if results == "summary":
             return concernNum, problemNum
         elif results == "indices":
-            return concern, problem
+            return concern.tolist(), problem.tolist()
         elif results == "both":
-            return concernNum, problemNum, concern, problem
+            return concernNum, problemNum, concern.tolist(), problem.tolist()
+
+
+    def _reflections(self, thresholds):
+        """returns frames and time stamps of points of concern and problematic points (see
+        findReflections) - the whole track is classified at once and the result is stored in
+        the track"""
+        key = ("reflections", self.indices.start, thresholds)
+        derived = self.track.derived
+        if key not in derived:
+            track = self.track
+            xs, ys = track.columns[self.indices]
+            times = track.time
+            dxs = list(map(sub, islice(xs, 1, None), xs))
+            dys = list(map(sub, islice(ys, 1, None), ys))
+
+            # directions of moves between consecutive rows and their changes
+            angles = [degrees(atan2(dx, dy + 0.0000001)) + 180 for dx, dy in zip(dxs, dys)]
+            changes = [180 - abs(abs(angle2 - angle1) - 180) for angle1, angle2 in
+                       zip(angles, islice(angles, 1, None))]
+
+            # speeds of moves to rows from the third one
+            resolution = self.trackerResolution
+            speeds = [(dx**2 + dy**2)**0.5 / (resolution * (t2 - t1) / 1000) for dx, dy, t1, t2 in
+                      zip(islice(dxs, 1, None), islice(dys, 1, None), islice(times, 1, None),
+                          islice(times, 2, None))]
+
+            problem, concern = thresholds
+            isProblem = [(problem.absolute * abs(90 - change) + problem.relative * change -
+                          speed) < problem.bound for change, speed in zip(changes, speeds)]
+            isConcern = [not isP and (concern.absolute * abs(90 - change) +
+                                      concern.relative * change - speed) < concern.bound
+                         for isP, change, speed in zip(isProblem, changes, speeds)]
+
+            frames, times = track.frame[2:], times[2:]
+            derived[key] = (array("l", compress(frames, isConcern)),
+                            array("d", compress(times, isConcern)),
+                            array("l", compress(frames, isProblem)),
+                            array("d", compress(times, isProblem)))
+        return derived[key]
 
 
     def _computeSpeed(self, row1, row2):
@@ -845,8 +1187,9 @@ class CM:
     def _findSame(self, indices, points):
         occurences = set()
         toDelete = set()
+        xs, ys = self.track.columns[indices]
         for point in points:
-            position = tuple(self.data[point][indices])
+            position = (xs[point], ys[point])
             if position in occurences:
                 toDelete.add(position)
                 occurences.remove(position)
@@ -857,8 +1200,12 @@ class CM:
     def _returnSame(self, missing):
         toDeleteArena = self._findSame(slice(7,9), missing)
         toDeleteRoom = self._findSame(slice(2,4), missing)
-        addMissing = {row[0] - 1 for row in self.data if tuple(row[2:4]) in toDeleteRoom or\
-                      tuple(row[7:9]) in toDeleteArena}
+        if not toDeleteArena and not toDeleteRoom:
+            return set()
+        track = self.track
+        addMissing = {frame - 1 for frame, x, y, ax, ay in
+                      zip(track.frame, *track.columns[2:4] + track.columns[7:9]) if
+                      (x, y) in toDeleteRoom or (ax, ay) in toDeleteArena}
         return addMissing
 
     def _removalCondition(self, row, i, before, reflection):
@@ -877,36 +1224,72 @@ class CM:
                     self._computeSpeed(reflection, new) * 30 < self._computeSpeed(before, new),
                     row + i in self.interpolated))
 
-    def _cacheRemoval(self):
-        if (self.nameA, self.nameR) in CM.cache:
-            CM.cache.pop((self.nameA, self.nameR))        
+    def _cacheKey(self):
+        "returns key of the loaded data in trackcache - the first item is their kind in diskcache"
+        return ("CM", self.nameA, self.nameR)
+
+    def _detach(self):
+        """copies the track before it is changed, so that the loaded data, which may be shared
+        by other objects through trackcache, stay unchanged"""
+        self.__dict__ = dict(self.__dict__)
+        self.track = self.track.copy()
 
     def removeReflections(self, points = None, deleteSame = True, bothframes = True):
-        "removes reflections - hopefully"
+        """removes reflections - hopefully
+            - the result is stored in trackcache and diskcache, so that the same reflections
+                are not removed again when the file is loaded next time (only the last
+                removal is kept in diskcache)
+        """
         # finding reflection points
         if points == None:
             points = self.findReflections(time = "max", startTime = 0, results = "indices")
             points = points[0] + points[1]
 
+        # already removed?
+        removed = getattr(self, "removedReflections", ()) + (
+            diskcache.digest((sorted(points), deleteSame, bothframes)),)
+        key = self._cacheKey() + removed
+        # only the last removal is stored on disk for each file - the stored data are used
+        # only if the same reflections were removed
+        kind = key[0] + " removed reflections"
+        cleaned = trackcache.get(key)
+        if not cleaned:
+            cleaned = diskcache.load(kind, self.stamp)
+            if cleaned and cleaned.get("removedReflections") == removed:
+                trackcache.put(key, cleaned)
+            else:
+                cleaned = None
+        if cleaned:
+            self.__dict__ = cleaned
+            return
+
         missing = {point - 1 for point in points}
 
         # finds data points that share coordinates with more than two points with reflections      
         if deleteSame:
             missing |= self._returnSame(missing)
 
-        missing = sorted(missing)
-
         if missing:
-            self._cacheRemoval()
-
-        # 'removal' itself
-        while missing:           
-            row = missing[0]
+            self._detach()
+            self._removeRows(missing, bothframes)
+            self.removedReflections = removed
+            diskcache.save(kind, self.stamp, self.__dict__)
+            trackcache.put(key, self.__dict__)
+
+
+    def _removeRows(self, missing, bothframes):
+        "replaces positions in 'missing' rows and in the rows around them (see removeReflections)"
+        # 'removal' itself - each run of rows to remove is extended by interpolated rows before
+        # it and by rows after it which satisfy _removalCondition; positions in the run are then
+        # interpolated between the correct rows around it
+        for row in sorted(missing):
+            if row not in missing:
+                # removed as a part of a previous run
+                continue
 
             j = 1
             while row - j in self.interpolated:
-                if row - j not in missing:
-                    missing.append(row - j)
+                missing.add(row - j)
                 j += 1
             
             before = self.data[row - j]
@@ -917,79 +1300,75 @@ class CM:
             last = len(self.data)
             if row + i < last - 1:
                 while row + i in missing or self._removalCondition(row, i, before, reflection):
-                    if row + i not in missing:
-                        missing.append(row + i)
+                    missing.add(row + i)
                     i += 1
                     # when the row-to-remove is the last one
                     if row + i == last - 1:
-                        afterID = row + i
-                        for count in range(1, afterID - beforeID):
-                            rw = beforeID + count
-                            self.data[rw][2:4] = before[2:4]
-                            if bothframes:
-                                self.data[rw][7:9] = before[7:9]
-                            missing.remove(rw)
+                        self._fillRun(beforeID, row + i, before, None, bothframes)
                         return
                 after = self.data[row + i]
                 afterID = row + i
             else:
                 # when the row-to-remove is the last one
-                for count, content in enumerate(self.data[row + i:]):
-                    self.data[row + i + count][2:4] = before[2:4]
-                    if bothframes:
-                        self.data[row + i + count][7:9] = before[7:9]
+                self._fillRun(row, last, before, None, bothframes)
                 return
 
             # the actual replacement of positions
-            for count in range(1, afterID - beforeID):
-                rw = beforeID + count
-                self.data[rw][2] = ((after[2] - before[2]) / (afterID - beforeID)) \
-                                    * (rw - beforeID) + before[2]
-                self.data[rw][3] = ((after[3] - before[3]) / (afterID - beforeID)) \
-                                    * (rw - beforeID) + before[3]
-                if bothframes:
-                    self.data[rw][7] = ((after[7] - before[7]) / (afterID - beforeID)) \
-                                        * (rw - beforeID) + before[7]            
-                    self.data[rw][8] = ((after[8] - before[8]) / (afterID - beforeID)) \
-                                        * (rw - beforeID) + before[8]
-                missing.remove(rw)
+            self._fillRun(beforeID, afterID, before, after, bothframes)
+            missing.difference_update(range(beforeID + 1, afterID))
+
+
+    def _fillRun(self, beforeID, afterID, before, after, bothframes):
+        """replaces positions in rows between rows beforeID and afterID - they are interpolated
+        between rows 'before' and 'after' or copied from 'before' if 'after' is None"""
+        rows = range(beforeID + 1, afterID)
+        for index in (2, 3, 7, 8) if bothframes else (2, 3):
+            column = self.track.columns[index]
+            if after is None:
+                values = [before[index]] * len(rows)
+            else:
+                step = (after[index] - before[index]) / (afterID - beforeID)
+                values = [step * (rw - beforeID) + before[index] for rw in rows]
+            if rows.start >= 0:
+                column[rows.start:rows.stop] = array("d", values)
+            else:
+                for rw, value in zip(rows, values):
+                    column[rw] = value
     
 
     def countBadPoints(self, time = 20, startTime = 0):
-        start = self.findStart(startTime)
-        
-        time *= 60000
-        startTime *= 60000
-        
-        count = 0
-        bad = 0
-        for content in self.data[start:]:
-            if content[1] > time:
-                break
-            else:
-                count += 1
-                if content[0] in self.interpolated:
-                    bad += 1
-
-        proportion = (bad / count) * 100
+        start, stop = self.findWindow(startTime, time)
+        if not self._sortedTime():
+            # rows are counted until the first row with time stamp larger than time
+            times = self.track.time
+            stop = next((row for row in range(start, stop) if times[row] > time * 60000), stop)
+
+        index = self._badPointsIndex()
+        proportion = ((index[stop] - index[start]) / (stop - start)) * 100
         return format(proportion, "0.2f")
     
 
     def countOutsidePoints(self, time = 20, startTime = 0, distance = 1):
         "returns number of data points where an animal was outside the arena"
-        time *= 60000
-        start = self.findStart(startTime)
-
-        Cx, Cy = self.centerX, self.centerY        
-
-        outside = 0
-        for content in self.data[start:]:
-            x, y = content[self.indices]
-            dist = ((x - Cx)**2 + (y - Cy)**2)**0.5
-            if dist > self.radius + distance and content[1] <= time:
-                outside += 1
-
-        return outside
+        start, stop = self.findWindow(startTime, time)
+        return self._windowCount(self._outsideIndex(distance), start, stop, time * 60000)
+
+
+    def qualityControl(self, time = 20, startTime = 0, distance = 1, thresholds = None):
+        """returns results of all quality controls (see QualityControl) - they are computed
+        from indices stored in the track and the result is stored there as well, so that
+        reflections are classified only once for all controls, removal of reflections and
+        showing of tracks"""
+        thresholds = thresholds or self.reflectionThresholds
+        key = ("quality control", self.indices.start, time, startTime, distance, thresholds)
+        derived = self.track.derived
+        if key not in derived:
+            derived[key] = QualityControl(
+                self.findReflections(time = time, startTime = startTime, results = "both",
+                                     thresholds = thresholds),
+                self.countOutsidePoints(time = time, startTime = startTime, distance = distance),
+                self.countBadPoints(time = time, startTime = startTime))
+        return derived[key]
 
 
     def realMinimumTime(self, **_):
@@ -1008,34 +1387,70 @@ class CM:
         return self.nameR
 
 
-    def _findStartHelper(self, imin, imax, time):
-        "binary search helper function for findStart"
-        if imin + 1 == imax:
-            return imax
-        else:
-            imid = (imin + imax) // 2
-            if self.data[imid][1] > time:
-                return self._findStartHelper(imin, imid, time)
-            elif self.data[imid][1] < time:
-                return self._findStartHelper(imid, imax, time)
-            else:
-                return imid                
-
     def findStart(self, startTime):
         "help function for finding starting position for computing parameters"
         startTime *= 60000
         if startTime == 0:
             return 0
-        else:
-            return self._findStartHelper(0, len(self.data), startTime)
+        times = self.track.time
+        if self._sortedTime():
+            # the first row is never returned for nonzero startTime
+            return bisect_left(times, startTime, 1)
+        imin, imax = 0, len(times)
+        while imin + 1 < imax:
+            imid = (imin + imax) // 2
+            if times[imid] > startTime:
+                imax = imid
+            elif times[imid] < startTime:
+                imin = imid
+            else:
+                return imid
+        return imax
+
+
+    def findWindow(self, startTime, time, strict = False):
+        """returns the first row of the time window from 'startTime' to 'time' (in minutes) and
+        the row after its last row (i.e. the first row with time stamp larger than 'time' - or
+        larger or equal if 'strict' is True)
+            - if time stamps are not sorted, the window ends at the end of the track and the time
+                stamps of the rows have to be checked
+        """
+        start = self.findStart(startTime)
+        if not self._sortedTime():
+            return start, len(self.track)
+        return start, self._stop(start, time * 60000, strict)
+
+
+    def windowCursor(self, start, time, skip):
+        """returns the first row after 'start' with time stamp larger or equal to 'time' (in
+        miliseconds), distance (in pixels) travelled from the first row of the track through
+        every 'skip'-th row from 'start' before that row, and number of entrances there
+            - used for animation of tracks (see explorer.AnimationCursor)
+            - returns None if time stamps are not sorted, the rows have to be processed one
+                by one then
+        """
+        if not self._sortedTime():
+            return None
+        stop = self._stop(start, time, strict = True)
+        distance = 0
+        entrances = 0
+        if stop > start:
+            xs, ys = self.track.columns[self.indices]
+            cumulative = self._distanceIndex(skip, 0, start % skip)
+            last = (stop - 1 - start % skip) // skip
+            distance = ((xs[start] - xs[0])**2 + (ys[start] - ys[0])**2)**0.5 + (
+                cumulative[last] - cumulative[start // skip])
+            entrances = self._countEvents("entrances", 5, start, stop)
+        return stop, distance, entrances
 
 
     def recognizeAfterShockStrategy(self, i0, i1, minAngle):
         "characterizes strategy after a shock"
         cx, cy = self.centerX, self.centerY
-        x0, y0 = self.data[i0][self.indices]
-        x1, y1 = self.data[i1][self.indices]
-        t0, t1 = self.data[i0][1], self.data[i1][1]
+        xs, ys = self.track.columns[self.indices]
+        x0, y0 = xs[i0], ys[i0]
+        x1, y1 = xs[i1], ys[i1]
+        t0, t1 = self.track.time[i0], self.track.time[i1]
         angle = ((degrees(atan2(x1 - cx, y1 - cy + 0.0000001)) -
                   degrees(atan2(x0 - cx, y0 - cy + 0.0000001)) + 180) % 360) - 180
         angleSpeed = (angle * 1000) / (t1 - t0)
@@ -1049,9 +1464,10 @@ class CM:
         
     def recognizeStrategy(self, i0, i1, minSpeed, percentSize):
         "characterizes strategy in absence of a shock"
-        x0, y0 = self.data[i0][self.indices]
-        x1, y1 = self.data[i1][self.indices]
-        t0, t1 = self.data[i0][1], self.data[i1][1]
+        xs, ys = self.track.columns[self.indices]
+        x0, y0 = xs[i0], ys[i0]
+        x1, y1 = xs[i1], ys[i1]
+        t0, t1 = self.track.time[i0], self.track.time[i1]
 
         speed = (sqrt(((x1 - x0)**2 + (y1 - y0)**2)) / self.trackerResolution) / ((t1 - t0) / 1000)
 
@@ -1059,7 +1475,7 @@ class CM:
             border = self.radius * (1 - (percentSize / 100))
             cx, cy = self.centerX, self.centerY
             inCenter = [sqrt((x - cx)**2 + (y - cy)**2) < border for x, y in
-                        [content[self.indices] for content in self.data[i0:i1+1]]]
+                        zip(xs[i0:i1+1], ys[i0:i1+1])]
             if any(inCenter):
                 return "center"
             else:
@@ -1085,13 +1501,15 @@ class CM:
             indices - return indices or times
             summary - return summary for results or dict with indices or times
         """
+        track = self.track
         try:
-            i1, t1 = self.data[self.findStart(time)][0:2]
+            last = self.findStart(time)
+            i1, t1 = track.frame[last], track.time[last]
         except IndexError:
-            i1, t1 = self.data[-1][0:2]
+            i1, t1 = track.frame[-1], track.time[-1]
         time = time * 60000
         start = self.findStart(startTime)
-        i0, t0 = self.data[start][0:2]
+        i0, t0 = track.frame[start], track.time[start]
 
         shocks = deque(self.getShocks(time = time, startTime = startTime, indices = True))
 
@@ -1127,7 +1545,7 @@ class CM:
                     strategies[lastStrategy].append((beginning, i))
                     beginning = i
                 else:
-                    t = self.data[i - 1][1]
+                    t = track.time[i - 1]
                     strategies[lastStrategy].append((beginning, t))
                     beginning = t                
 
@@ -1141,7 +1559,7 @@ class CM:
         if indices:
             strategies[lastStrategy].append((beginning, i1))
         else:
-            t = self.data[i1 - 1][1]
+            t = track.time[i1 - 1]
             strategies[lastStrategy].append((beginning, t))       
 
         if summary:
@@ -1176,11 +1594,12 @@ class CM:
         cx, cy = self.centerX, self.centerY
         speeds = []
 
-        ax0, ay0 = self.data[start][7:9]
-        t0, rx0, ry0 = self.data[start][1:4]        
-        for content in self.data[(start+rows):end:rows]:
-            ax1, ay1 = content[7:9]
-            t1, rx1, ry1 = content[1:4]
+        track = self.track
+        ax0, ay0 = track.row(start)[7:9]
+        t0, rx0, ry0 = track.row(start)[1:4]
+        rows = slice(start + rows, end, rows)
+        for ax1, ay1, t1, rx1, ry1 in zip(*[column[rows] for column in
+                                            track.columns[7:9] + track.columns[1:4]]):
         
             arenaAngle = ((degrees(atan2(ax1 - cx, ay1 - cy + 0.0000001)) -
                            degrees(atan2(ax0 - cx, ay0 - cy + 0.0000001)) + 180) % 360) - 180
@@ -17,46 +17,50 @@ You should have received a copy of the GNU General Public License
 along with Carousel Maze Manager.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from collections import OrderedDict
-
-
 from cm import CM
 from singleframe import SF
+import diskcache
+import trackcache
 
 
 class CMSF(SF, CM):
-    cache = OrderedDict()
-
     def __init__(self, nameA, *_):
 
         self.nameA = nameA
-        self.data = []
         self.interpolated = set()
         self.indices = slice(2,4)
 
         # in cache?
-        if self.nameA in CMSF.cache:
-            self.__dict__ = CMSF.cache[self.nameA]
+        cached = trackcache.get(("CMSF", self.nameA))
+        if cached:
+            self.__dict__ = cached
             return
 
-        # processing data from arena frame
-        with open(self.nameA, "r") as infile:
-            self.width = 60
-            self.centerAngle = 0
-            self._processHeader(infile)
-            self._processRoomFile(infile)
-
-        # discards missing points from beginning of self.data
-        self._correctMissingFromBeginning()
-          
-        # exception used for example when all lines are wrong (all positions are 0, 0)
-        if not self.data:
-            raise Exception("Failure in data initialization.")
+        # stored on disk?
+        stamp = diskcache.stamp(self.nameA)
+        stored = diskcache.load("CMSF", stamp)
+        if stored:
+            self.__dict__ = stored
+        else:
+            # processing data from arena frame
+            with open(self.nameA, "r") as infile:
+                self.width = 60
+                self.centerAngle = 0
+                self._processHeader(infile)
+                self._processRoomFile(infile)
+
+            # discards missing points from beginning of self.data
+            self._correctMissingFromBeginning()
+
+            # exception used for example when all lines are wrong (all positions are 0, 0)
+            if not self.data:
+                raise Exception("Failure in data initialization.")
+
+            self.stamp = stamp
+            diskcache.save("CMSF", stamp, self.__dict__)
 
         # caching
-        CMSF.cache[self.nameA] = self.__dict__
-        if len(CMSF.cache) > 15:
-            CMSF.cache.popitem(last = False)
+        trackcache.put(("CMSF", self.nameA), self.__dict__)
 
    
     def _removalCondition(self, row, i, before, reflection):
@@ -74,9 +78,8 @@ class CMSF(SF, CM):
                     row + i in self.interpolated))
     
 
-    def _cacheRemoval(self):
-        if self.nameA in CMSF.cache:
-            CMSF.cache.pop(self.nameA) 
+    def _cacheKey(self):
+        return ("CMSF", self.nameA)
 
     def removeReflections(self, *args, bothframes = False, **kwargs):
         super().removeReflections(*args, bothframes = bothframes, **kwargs)
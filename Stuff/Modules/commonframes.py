@@ -27,6 +27,7 @@ import os
 
 
 from optionget import optionGet
+from batch import returnName
 import mode as m
 
 
@@ -178,17 +179,3 @@ class SaveToFrame(ttk.Frame):
                 self.root.process.state(["disabled"])               
             
         return True
-            
-
-
-
-def returnName(filename, allFiles):
-    "depending on option 'SaveFullPath' returns full name of basename"
-    selected = optionGet("SaveFullPath", "Basename", "str", True)
-    if selected == "Unique path":
-        sharedName = os.path.split(os.path.commonprefix(allFiles))[0]
-        return filename[len(sharedName):].lstrip("/\\")
-    elif selected == "Full path":
-        return filename
-    else:
-        return basename(filename)
@@ -20,6 +20,10 @@ along with Carousel Maze Manager.  If not, see <http://www.gnu.org/licenses/>.
 from tkinter import *
 from tkinter import ttk
 
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, wait
+from operator import methodcaller
+from time import time
 import os
 import os.path
 
@@ -28,6 +32,7 @@ from commonframes  import TimeFrame, SaveToFrame, returnName
 from filestorage import FileStorageFrame
 from optionget import optionGet
 from processor import writeResults, ProgressWindow
+from controlstore import ControlStore
 from comment import Comment, commentColor
 import mode as m
 
@@ -41,17 +46,52 @@ class ControlSelection(ttk.Checkbutton):
 
 
 class Controls(list):
-    "class containing list of controls, their methods and options"
+    """class containing list of controls, their methods and options
+        - each control is [name, field of cm.QualityControl], all controls are computed at
+            once by CL.qualityControl
+        - options are {name of argument of qualityControl: arguments of optionGet} (as in
+            parameters' options)
+    """
+    options = {"distance": ("OutsidePointsDistance", 1, "int")}
+
     def __init__(self):
-        self.controls = [["Reflections", """findReflections(time = time, startTime = startTime,
-                            results = 'both')"""],
-                         ["Outside Points", """countOutsidePoints(time = time,
-                           startTime = startTime, distance = optionGet('OutsidePointsDistance',
-                           1, 'int'))"""],
-                         ["Bad Points", "countBadPoints(time = time, startTime = startTime)"]
+        self.controls = [["Reflections", "reflections"],
+                         ["Outside Points", "outside"],
+                         ["Bad Points", "badPoints"]
                          ]
         
 
+
+# everything needed for controlling of one file - has to be picklable, because jobs are sent
+# to other processes when files are controlled in parallel
+#   - method is a methodcaller of qualityControl
+ControlJob = namedtuple("ControlJob", ["mode", "file", "pairedFile", "method"])
+
+# loaded is False when the file could not be loaded (results is None then), results are
+# cm.QualityControl (None if computation failed) and stamp identifies the loaded files (see
+# diskcache.stamp) - it is None for results taken from ControlStore
+Controlled = namedtuple("Controlled", ["loaded", "results", "stamp"])
+
+
+def controlFile(job):
+    """loads a file and computes all controls for it - does not use GUI, therefore it can be
+    called in another process"""
+    if m.mode != job.mode:
+        m.changeMode(job.mode)
+
+    try:
+        cm = m.CL(job.file, job.pairedFile)
+    except Exception:
+        return Controlled(False, None, None)
+
+    try:
+        results = job.method(cm)
+    except Exception:
+        results = None
+    return Controlled(True, results, getattr(cm, "stamp", None))
+
+
+
 class ControlFrame(ttk.Labelframe):
     "class contatining checkbuttons for selection of methods in Controller"
     def __init__(self, root):
@@ -69,7 +109,7 @@ class ControlFrame(ttk.Labelframe):
         selected = []
         for control in self.controls.controls:
             if eval("self.{}.onVar.get()".format(control[0].replace(" ", "_"))):
-                selected.append((control[0], control[1]))
+                selected.append(control)
         return selected
             
                              
@@ -295,6 +335,7 @@ class Controller(ttk.Frame):
         self.saveBut.grid(column = 1, row = 1, sticky = E, padx = 2)
     
         self.controlReport = ControlReport(self)
+        self.controlStore = ControlStore()
                        
         self.contentTree.tag_bind("file", "<Double-1>", lambda e: self.treeDoubleClick(e))
         self.contentTree.tag_bind("file", "<3>", lambda e: self.filePopUp(e))
@@ -449,7 +490,8 @@ class Controller(ttk.Frame):
 
 
     def controlFun(self):
-        "processes selected files, clears report, shows results in a report"
+        """processes selected files, clears report, shows results in a report - the report is
+        updated while the files are being processed"""
 
         # progressbar
         if len(self.fileStorage) > 1:
@@ -463,37 +505,51 @@ class Controller(ttk.Frame):
         self.controlReport.addControls(controls) # adds selected controls to ControlReport
 
         self.problemOccured = False
-        # processing      
-        for file in self.fileStorage:
-            tag = "x" if file in self.fileStorage.tagged else " "
-            try:
-                if file in self.fileStorage.pairedfiles:
-                    cm = m.CL(file, self.fileStorage.pairedfiles[file])
-                else:
-                    cm = m.CL(file, "auto")
-            except Exception:
-                self.problemOccured = True
-                for control in controls:
-                    self.controlReport.addFile((control[0], [file, "Failed to load!", "Problem",
-                                                             9999999, tag]))
-            else:
-                for control in controls:
-                    try:
-                        assessment = self.assessImportance(cm = cm, control = control, file = file)
-                        assessment[1].append(tag)
-                    except Exception:
-                        self.problemOccured = True
-                        assessment = (control[0], [file, "Failed to compute!", "Problem",
-                                                   9999998, tag])
-                    self.controlReport.addFile(assessment)
-                     
-            if len(self.fileStorage) > 1:
-                if self.stoppedProcessing:
-                    return
-                else:
-                    self.progressWindow.addOne()
-                    
-        self.controlReport.updateTree()
+        jobs = self._jobs()
+
+        # files which did not change since they were controlled with the same parameters are
+        # not controlled again
+        stored = {}
+        for key, job in jobs:
+            results = self.controlStore.get(key)
+            if results is not None:
+                stored[job.file] = Controlled(True, results, None)
+        toControl = [job for key, job in jobs if job.file not in stored]
+
+        processes = min(optionGet("ProcessorProcesses", 1, "int", True), len(toControl))
+        if processes > 1:
+            executor = ProcessPoolExecutor(processes)
+            computed = self._computeInParallel(executor, toControl)
+        else:
+            executor = None
+            computed = map(controlFile, toControl)
+
+        # processing
+        refreshed = time()
+        try:
+            for key, job in jobs:
+                result = stored.get(job.file) or next(computed)
+                if result.stamp and result.results:
+                    self.controlStore.put(key, result.stamp, result.results)
+                self._addResults(job.file, controls, result)
+
+                # the tree is rebuilt at most twice per second while the files are processed
+                if time() - refreshed > 0.5:
+                    self.refresh()
+                    refreshed = time()
+
+                if len(self.fileStorage) > 1:
+                    if self.stoppedProcessing:
+                        self.refresh()
+                        return
+                    else:
+                        self.progressWindow.addOne()
+        finally:
+            if executor:
+                executor.shutdown(wait = False, cancel_futures = True)
+            self.controlStore.save()
+
+        self.refresh()
 
         # progressbar and status
         if len(self.fileStorage) > 1:
@@ -509,13 +565,63 @@ class Controller(ttk.Frame):
                 self.bell()
             else:
                 self.status.set("File was processed successfully.")          
+
+
+    def _jobs(self):
+        """returns jobs for controlling of all files (see ControlJob) together with their keys
+        in ControlStore"""
+        startTime = int(self.timeFrame.startTimeVar.get())
+        stopTime = int(self.timeFrame.timeVar.get())
+        options = {name: optionGet(*option) for name, option in Controls.options.items()}
+        method = methodcaller("qualityControl", startTime = startTime, time = stopTime,
+                              **options)
+        parameters = (startTime, stopTime, tuple(sorted(options.items())))
+        jobs = []
+        for file in self.fileStorage:
+            pairedFile = self.fileStorage.pairedfiles.get(file, "auto")
+            jobs.append(((m.mode, file, pairedFile, parameters),
+                         ControlJob(m.mode, file, pairedFile, method)))
+        return jobs
+
+
+    def _computeInParallel(self, executor, jobs):
+        """controls files in other processes and yields the results in the order of jobs,
+        the window is updated while waiting for the results"""
+        futures = [executor.submit(controlFile, job) for job in jobs]
+        for future in futures:
+            while not future.done():
+                self.update()
+                wait([future], timeout = 0.05)
+            yield future.result()
+
+
+    def _addResults(self, file, controls, computed):
+        "adds results of controls computed for a file (see Controlled) to the report"
+        tag = "x" if file in self.fileStorage.tagged else " "
+        if not computed.loaded:
+            self.problemOccured = True
+            for control in controls:
+                self.controlReport.addFile((control[0], [file, "Failed to load!", "Problem",
+                                                         9999999, tag]))
+            return
+        for control in controls:
+            try:
+                if computed.results is None:
+                    raise ValueError("computation of controls failed")
+                results = getattr(computed.results, control[1])
+                assessment = self.assessImportance(results = results, control = control,
+                                                   file = file)
+                assessment[1].append(tag)
+            except Exception:
+                self.problemOccured = True
+                assessment = (control[0], [file, "Failed to compute!", "Problem",
+                                           9999998, tag])
+            self.controlReport.addFile(assessment)
         
 
-    def assessImportance(self, cm, control, file):
+    def assessImportance(self, results, control, file):
         "method needed for evaluation of importance of results from CM class' control methods"
         method = control[0]
-        startTime, time = int(self.timeFrame.startTimeVar.get()), int(self.timeFrame.timeVar.get())
-        results = eval("cm.{}".format(control[1]))
         description = ""
         importance = ""
         value = 0
@@ -565,7 +671,7 @@ class Controller(ttk.Frame):
             description = "{0:.2f}% bad points".format(results)
             value = results            
                     
-        return (method, [cm.nameA, description, importance, value])
+        return (method, [file, description, importance, value])
 
             
     def saveFun(self):
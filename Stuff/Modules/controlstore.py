@@ -0,0 +1,102 @@
+"""
+Copyright 2013 Štěpán Bahník
+
+This file is part of Carousel Maze Manager.
+
+Carousel Maze Manager is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Carousel Maze Manager is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Carousel Maze Manager.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+import pickle
+import zlib
+import os
+
+
+import diskcache
+
+
+# results of quality controls (see CM.qualityControl) of controlled files are stored here, so
+# that files which did not change since they were controlled are not controlled again - like
+# diskcache, the file can be deleted at any time
+filename = os.path.join(diskcache.directory, "controls.cache")
+
+# has to be changed whenever computation of quality controls changes their results
+version = 1
+
+
+
+class ControlStore:
+    """
+    persistent store of results of quality controls - keys are tuples (mode, arena file, paired
+        file, parameters), where parameters identify the time window and options of the controls
+        - each result is stored together with the stamp of the loaded files (see
+            diskcache.stamp) and it is used only while the files do not change
+    """
+    def __init__(self, filename = filename):
+        self.filename = filename
+        self.results = {}
+        self.changed = False
+        self.load()
+
+
+    def get(self, key):
+        "returns stored results or None if they are not stored or the files changed since then"
+        if key not in self.results:
+            return None
+        stamp, results = self.results[key]
+        try:
+            current = diskcache.stamp(*[file for file, _, _ in stamp])
+        except OSError:
+            current = None
+        if current != stamp:
+            del self.results[key]
+            self.changed = True
+            return None
+        return results
+
+
+    def put(self, key, stamp, results):
+        "stores results of controls of files identified by stamp"
+        self.results[key] = (stamp, results)
+        self.changed = True
+
+
+    def load(self):
+        "loads stored results - nothing is loaded if the file is missing or outdated"
+        try:
+            with open(self.filename, mode = "rb") as infile:
+                stored = pickle.loads(zlib.decompress(infile.read()))
+            if stored["version"] == (version, diskcache.version):
+                self.results = stored["results"]
+        except Exception:
+            self.results = {}
+        self.changed = False
+
+
+    def save(self):
+        "writes the results to the file if they changed"
+        if not self.changed:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.filename), exist_ok = True)
+            stored = {"version": (version, diskcache.version), "results": self.results}
+            data = zlib.compress(pickle.dumps(stored, pickle.HIGHEST_PROTOCOL), 1)
+            # written under a temporary name first, so that an incomplete file is never read
+            temporary = "{}.{}.tmp".format(self.filename, os.getpid())
+            with open(temporary, mode = "wb") as outfile:
+                outfile.write(data)
+            os.replace(temporary, self.filename)
+            self.changed = False
+        except Exception:
+            # the files are controlled again the next time
+            pass
@@ -0,0 +1,84 @@
+"""
+Copyright 2013 Štěpán Bahník
+
+This file is part of Carousel Maze Manager.
+
+Carousel Maze Manager is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Carousel Maze Manager is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Carousel Maze Manager.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from hashlib import md5
+
+import pickle
+import zlib
+import os
+
+
+# loaded data (track and header information) are stored here, so that the data files need not
+# be parsed again - stored data are used only while sizes and times of modification of the data
+# files are the same as when they were loaded; the directory can be deleted at any time
+directory = os.path.join(os.getcwd(), "Stuff", "Cache")
+
+# has to be changed whenever loading of files changes the loaded data
+version = 3
+
+
+def stamp(*files):
+    "returns identification of the current state of files - should be taken before loading"
+    stamps = []
+    for file in files:
+        file = os.path.abspath(file)
+        info = os.stat(file)
+        stamps.append((file, info.st_size, info.st_mtime_ns))
+    return tuple(stamps)
+
+
+def digest(value):
+    "returns identification of a value (e.g. of a set of points) which can be used in a kind"
+    return md5(repr(value).encode("utf-8")).hexdigest()
+
+
+def _filename(kind, stamp):
+    name = repr((kind, [file for file, _, _ in stamp]))
+    return os.path.join(directory, md5(name.encode("utf-8")).hexdigest() + ".cache")
+
+
+def load(kind, stamp):
+    """returns attributes stored for files in stamp (loaded by class 'kind') if the files did
+    not change since they were stored, otherwise returns None
+    """
+    try:
+        with open(_filename(kind, stamp), mode = "rb") as infile:
+            stored = pickle.loads(zlib.decompress(infile.read()))
+        if stored["version"] == version and stored["stamp"] == stamp:
+            return stored["attributes"]
+    except Exception:
+        pass
+    return None
+
+
+def save(kind, stamp, attributes):
+    "stores attributes of an object of class 'kind' loaded from files in stamp"
+    try:
+        os.makedirs(directory, exist_ok = True)
+        stored = {"version": version, "stamp": stamp, "attributes": attributes}
+        data = zlib.compress(pickle.dumps(stored, pickle.HIGHEST_PROTOCOL), 1)
+        filename = _filename(kind, stamp)
+        # written under a temporary name first, so that an incomplete file is never read
+        temporary = "{}.{}.tmp".format(filename, os.getpid())
+        with open(temporary, mode = "wb") as outfile:
+            outfile.write(data)
+        os.replace(temporary, filename)
+    except Exception:
+        # the data are only loaded from the original files the next time
+        pass
@@ -20,7 +20,9 @@ along with Carousel Maze Manager.  If not, see <http://www.gnu.org/licenses/>.
 from tkinter import *
 from tkinter import ttk
 from time import time
-from math import cos, sin, radians, degrees, atan2, floor
+from concurrent.futures import ThreadPoolExecutor
+from math import cos, sin, radians, degrees, atan2
+from operator import sub
 
 
 import os
@@ -32,8 +34,10 @@ from filestorage import FileStorageFrame
 from commonframes import TimeFrame, returnName
 from image import svgSave, ImagesOptions
 from processor import ProgressWindow
+from simplify import polyline
 from optionget import optionGet
-from graphs import getGraphTypes, Graphs, SvgGraph, SpeedGraph, DistanceFromCenterGraph
+from graphs import getGraphTypes, computeSeries, Graphs, SvgGraph, SpeedGraph
+from graphs import DistanceFromCenterGraph
 from graphs import AngleGraph, DistanceFromPlatformGraph, DistanceFromRobotGraph
 from comment import Comment, commentColor
 import mode as m
@@ -48,6 +52,15 @@ class Explorer(ttk.Frame):
 
         self.animate = "stop"
         self.initialized = False
+        self.cursor = None
+        self.playJob = None
+        self.tail = {}
+        self.tailKey = None # track and scale for which the tail was computed
+        self.loader = ThreadPoolExecutor(1) # worker thread for loading of files
+        self.loading = None # future of the file which is being loaded
+        self.loadingReset = True # whether time is reset when the loaded file is shown
+        self.prefetched = {} # filename: (arguments of loadFile, future)
+        self.prepared = {} # values computed in the worker thread for self.cm (see loadFile)
         self.root = root
         self.fileStorage = self.root.fileStorage
 
@@ -375,7 +388,10 @@ class Explorer(ttk.Frame):
 
     def toggleReflections(self):
         "called when reflections removal is changed - just refreshes canvases"
-        if self.initialized:          
+        if self.loading:
+            # the file is loaded again with the current settings
+            self.initializeFile(self.fileFrame.selected, new = True, timeReset = self.loadingReset)
+        elif self.initialized:          
             if self.removeReflectionsVar.get():
                 self.cm.removeReflections(points = self.fileStorage.reflections.get(self.cm.nameA,
                                                                                     None))
@@ -410,27 +426,57 @@ class Explorer(ttk.Frame):
         self.saveBut.state(["disabled"])
             
         self.animate = "" # status of the animation - '', 'pause', 'stop'
-        
-        prevTime = time()
-        while not self.animate:
-            # finds current time
-            nowTime = time()
-            difTime = (nowTime - prevTime) * 1000
-            playTime = difTime * self.speed.get() + (
-                self.curTime.get() * (self.maxTime - self.minTime) / 100) + self.minTime
-
-            if playTime > self.maxTime:
-                self.curTime.set(100)
-                self.timeVar.set(self._timeFormat(self.maxTime))  
-                self.animate = "stop"
-                self.timeFrame.changeState("!disabled")
-                self.showTrack["state"] = "!disabled"
-                self.saveBut.state(["!disabled"])
-                break
 
-            self.changedTime(playTime, unit = "ms")
+        # frames are scheduled by after() at most 'ExplorerFPS' times per second - when drawing
+        # of a frame takes longer, the time of the next frame is still given by the clock, so
+        # frames in between are skipped
+        fps = max(optionGet("ExplorerFPS", 25, "int", True), 1)
+        self.frameInterval = 1000 / fps
+        if self.playJob:
+            self.after_cancel(self.playJob)
+        self.prevTime = time()
+        self.frameStats = [self.prevTime, 0, 0] # start of measurement, frames, time of drawing
+        self.playJob = self.after_idle(self._playFrame)
+
+
+    def _playFrame(self):
+        "draws one frame of the animation and schedules the next one"
+        self.playJob = None
+        if self.animate:
+            return
+
+        # finds current time
+        nowTime = time()
+        difTime = (nowTime - self.prevTime) * 1000
+        playTime = difTime * self.speed.get() + (
+            self.curTime.get() * (self.maxTime - self.minTime) / 100) + self.minTime
+        self.prevTime = nowTime
+
+        if playTime > self.maxTime:
+            self.curTime.set(100)
+            self.timeVar.set(self._timeFormat(self.maxTime))  
+            self.animate = "stop"
+            self.timeFrame.changeState("!disabled")
+            self.showTrack["state"] = "!disabled"
+            self.saveBut.state(["!disabled"])
+            self._showComment(self.fileFrame.selected)
+            return
+
+        self.changedTime(playTime, unit = "ms")
+
+        # measured frame rate and cost of a frame are shown in the status bar every second
+        finished = time()
+        self.frameStats[1] += 1
+        self.frameStats[2] += finished - nowTime
+        elapsed = finished - self.frameStats[0]
+        if elapsed >= 1:
+            start, frames, drawing = self.frameStats
+            self.status.set("{:.0f} FPS, {:.1f} ms per frame".format(
+                frames / elapsed, drawing * 1000 / frames))
+            self.frameStats = [finished, 0, 0]
 
-            prevTime = nowTime
+        delay = self.frameInterval - (finished - nowTime) * 1000
+        self.playJob = self.after(max(int(delay), 1), self._playFrame)
 
 
     def changedTime(self, value, unit = "0-100"):
@@ -487,44 +533,16 @@ class Explorer(ttk.Frame):
             self.curTime.set(100)
             self.timeVar.set(self._timeFormat(self.maxTime))          
 
-        self.update()
+        self.update_idletasks()
 
 
     def _updateDefaultParameters(self, time):
-        indices = self.cm.indices
-        x0, y0 = self.cm.data[0][indices] 
-        dist = 0
-        entrances = 0
-        prev = 0
-        skip = 25 # z options
-        start = self.cm.findStart(self.minTime / 60000)
-        for row, content in enumerate(self.cm.data[start:]):
-            if content[1] < time:
-                # distance
-                if row % skip == 0:
-                    x1, y1 = content[indices]
-                    diff = ((x1 - x0)**2 + (y1 - y0)**2)**0.5
-                    dist += diff
-                    x0, y0 = x1, y1
-                # entrances
-                if content[5] != 2 and prev != 2:
-                    continue
-                elif content[5] != 2 and prev == 2:
-                    if content[5] == 0: 
-                        prev = 0
-                    continue
-                elif content[5] == 2 and prev == 2:
-                    continue
-                elif content[5] == 2 and prev != 2:
-                    entrances += 1
-                    prev = 2
-                    continue
-            else:
-                curLine = content
-                break
-        dist = dist / (self.cm.trackerResolution * 100) # conversion from pixels to metres
+        if not self.cursor or not self.cursor.matches(self.cm, self.minTime):
+            self.cursor = AnimationCursor(self.cm, self.minTime)
+        curLine = self.cursor.moveTo(time)
+        dist = self.cursor.distance / (self.cm.trackerResolution * 100) # conversion to metres
         self.distanceVar.set("{:.1f}".format(dist))
-        self.entrancesVar.set(entrances)
+        self.entrancesVar.set(self.cursor.entrances)
         return curLine
 
 
@@ -539,51 +557,77 @@ class Explorer(ttk.Frame):
 
 
     def _createTail(self, curLine):
-        self.arenaCanv.delete("trailA")
-        self.roomCanv.delete("trailR")
-        if curLine[0] >= 10:
-            end = curLine[0]
-            adjust = 150 - self.cm.radius * self.scale
-            start = end - 500 if end > 500 else 0
-            start = round(start*2, -1) // 2
-            if m.mode in ("CM", "KT"):
-                trail = [tuple(content[2:4] + content[7:9]) for content in
-                         self.cm.data[start:end:5]]
-                arena = []
-                room = []
-                for rx, ry, ax, ay in trail:
-                    arena.append((ax*self.scale + adjust, ay*self.scale + adjust))
-                    room.append((rx*self.scale + adjust, ry*self.scale + adjust))
-                arena.append((curLine[7]*self.scale + adjust, curLine[8]*self.scale + adjust))
-                room.append((curLine[2]*self.scale + adjust, curLine[3]*self.scale + adjust))
-                self.arenaCanv.create_line((arena), fill = "blue", width = 2, tag = "trailA")
-                self.roomCanv.create_line((room), fill = "blue", width = 2, tag = "trailR")
-            elif m.mode == "RA":
-                self.arenaCanv.delete("trailRobot")
-                trail = [tuple(content[2:4] + content[7:9]) for content in
-                         self.cm.data[start:end:5]]
-                ratA = []
-                ratR = []
-                robotA = []
-                for rx, ry, ax, ay in trail:
-                    ratA.append((ax*self.scale + adjust, ay*self.scale + adjust))
-                    robotA.append((rx*self.scale + adjust, ry*self.scale + adjust))
-                    ratR.append(((ax - rx)*self.scale / 2 + 150,
-                                 (ay - ry)*self.scale / 2 + 150))
-                ratA.append((curLine[7]*self.scale + adjust, curLine[8]*self.scale + adjust))
-                robotA.append((curLine[2]*self.scale + adjust, curLine[3]*self.scale + adjust))
-                ratR.append(((curLine[7] - curLine[2])*self.scale / 2 + 150,
-                             (curLine[8] - curLine[3])*self.scale / 2 + 150))
-                self.arenaCanv.create_line((ratA), fill = "blue", width = 2, tag = "trailA")
-                self.roomCanv.create_line((ratR), fill = "blue", width = 2, tag = "trailR")
-                self.arenaCanv.create_line((robotA), fill = "green", width = 2, tag = "trailRobot")
-            else:
-                trail = [tuple(content[2:4]) for content in self.cm.data[start:end:5]]
-                arena = []
-                for ax, ay in trail:
-                    arena.append((ax*self.scale + adjust, ay*self.scale + adjust))
-                arena.append((curLine[2]*self.scale + adjust, curLine[3]*self.scale + adjust))
-                self.arenaCanv.create_line((arena), fill = "blue", width = 2, tag = "trailA")
+        if curLine[0] < 10:
+            self.arenaCanv.delete("trailA")
+            self.roomCanv.delete("trailR")
+            self.arenaCanv.delete("trailRobot")
+            return
+        if self.tailKey != (self.cm.track, self.scale):
+            self._computeTail(self.scale)
+
+        # every fifth row between 'start' and 'end' - i.e. a window over the precomputed points
+        end = curLine[0]
+        start = end - 500 if end > 500 else 0
+        start = round(start*2, -1) // 2
+        first, last = 2 * (start // 5), 2 * ((end + 4) // 5)
+        scale = self.scale
+        adjust = 150 - self.cm.radius * scale
+
+        if m.mode in ("CM", "KT"):
+            arena = self.tail["arena"][first:last]
+            arena.extend((curLine[7]*scale + adjust, curLine[8]*scale + adjust))
+            room = self.tail["room"][first:last]
+            room.extend((curLine[2]*scale + adjust, curLine[3]*scale + adjust))
+            self._drawTail(self.arenaCanv, "trailA", arena, "blue")
+            self._drawTail(self.roomCanv, "trailR", room, "blue")
+        elif m.mode == "RA":
+            ratA = self.tail["arena"][first:last]
+            ratA.extend((curLine[7]*scale + adjust, curLine[8]*scale + adjust))
+            robotA = self.tail["robot"][first:last]
+            robotA.extend((curLine[2]*scale + adjust, curLine[3]*scale + adjust))
+            ratR = self.tail["room"][first:last]
+            ratR.extend(((curLine[7] - curLine[2])*scale / 2 + 150,
+                         (curLine[8] - curLine[3])*scale / 2 + 150))
+            self._drawTail(self.arenaCanv, "trailA", ratA, "blue")
+            self._drawTail(self.roomCanv, "trailR", ratR, "blue")
+            self._drawTail(self.arenaCanv, "trailRobot", robotA, "green")
+        else:
+            arena = self.tail["arena"][first:last]
+            arena.extend((curLine[2]*scale + adjust, curLine[3]*scale + adjust))
+            self._drawTail(self.arenaCanv, "trailA", arena, "blue")
+
+
+    def _drawTail(self, canvas, tag, points, color):
+        "moves the line of a tail to the points, the line is created if it does not exist"
+        if canvas.find_withtag(tag):
+            canvas.coords(tag, points)
+        else:
+            canvas.create_line(points, fill = color, width = 2, tag = tag)
+
+
+    def _computeTail(self, scale):
+        """computes screen coordinates of every fifth row of the track for the tail
+            - points are stored in flat lists (x1, y1, x2, y2, ...) in self.tail"""
+        columns = self.cm.track.columns
+        adjust = 150 - self.cm.radius * scale
+
+        def points(xs, ys):
+            return [value for x, y in zip(xs[::5], ys[::5])
+                    for value in (x*scale + adjust, y*scale + adjust)]
+
+        if m.mode in ("CM", "KT"):
+            self.tail = {"arena": points(columns[7], columns[8]),
+                         "room": points(columns[2], columns[3])}
+        elif m.mode == "RA":
+            ax, ay, rx, ry = (column[::5] for column in (columns[7], columns[8],
+                                                          columns[2], columns[3]))
+            self.tail = {"arena": points(columns[7], columns[8]),
+                         "robot": points(columns[2], columns[3]),
+                         "room": [value for x, y in zip(map(sub, ax, rx), map(sub, ay, ry))
+                                  for value in (x*scale / 2 + 150, y*scale / 2 + 150)]}
+        else:
+            self.tail = {"arena": points(columns[2], columns[3])}
+        self.tailKey = (self.cm.track, scale)
 
 
     def _setShockColor(self, curLine):
@@ -632,6 +676,7 @@ class Explorer(ttk.Frame):
             self.timeFrame.changeState("!disabled")        
             self.showTrack["state"] = "!disabled"
             self.saveBut.state(["!disabled"])
+            self._showComment(self.fileFrame.selected)
             
 
     def stopFun(self):
@@ -641,14 +686,34 @@ class Explorer(ttk.Frame):
         self.timeFrame.changeState("!disabled")          
         self.showTrack["state"] = "!disabled"
         self.saveBut.state(["!disabled"])
+        if self.fileFrame.selected:
+            self._showComment(self.fileFrame.selected)
         
 
     def initializeFile(self, filename, new = True, timeReset = True):
-        "initializes canvases, graph, etc."
+        """initializes canvases, graph, etc.
+            - a new file is loaded in the worker thread, canvases are initialized when it is
+                loaded (see _waitForFile)"""
         if new:
-            successful = self._loadData(filename)
-            if not successful:
-                return
+            job = self._loadingJob(filename)
+            prefetched = self.prefetched.pop(filename, None)
+            # other queued files would delay loading of the selected file
+            for _, future in self.prefetched.values():
+                future.cancel()
+            if self.loading:
+                self.loading.cancel()
+            self.prefetched = {}
+            if prefetched and prefetched[0] == job:
+                self.loading = prefetched[1]
+            else:
+                if prefetched:
+                    prefetched[1].cancel()
+                self.loading = self.loader.submit(loadFile, *job)
+            self.loadingReset = timeReset
+            if not self.loading.done():
+                self.status.set("Loading...")
+            self._waitForFile(self.loading, job, filename, timeReset)
+            return
 
         self.scale = 130 / self.cm.radius
         self.shock = False
@@ -672,13 +737,19 @@ class Explorer(ttk.Frame):
         self.maxTime = min([self.cm.data[-1][1], eval(self.timeFrame.timeVar.get()) * 60000])
         self.minTime = max([self.cm.data[0][1], eval(self.timeFrame.startTimeVar.get()) * 60000])
 
+        # values computed in the worker thread are used only for the same data and time
+        prepared = self.prepared
+        if prepared.get("track") is not self.cm.track or \
+           prepared.get("window") != (self.minTime, self.maxTime):
+            prepared = {}
+
         if self.showTrackVar.get() or (m.files != "pair" and m.mode != "KT"):
             self._drawTrack()
             
         if not self.showTrackVar.get() or (m.files != "pair" and m.mode != "KT"):
             self._initializeAnimation()
 
-        self._setParameterDisplays(timeReset)
+        self._setParameterDisplays(timeReset, prepared)
 
         self.graph.delete("all")
         if timeReset:
@@ -691,10 +762,71 @@ class Explorer(ttk.Frame):
         self._changeButtonStatuses()
         self._showComment(filename)
         self.initialized = True       
-        
-        if new and timeReset:
+
+
+    def _loadingJob(self, filename):
+        "returns arguments of loadFile for the file with current settings"
+        return (m.CL, filename, self.fileStorage.pairedfiles.get(filename, "auto"),
+                self.removeReflectionsVar.get(), self.fileStorage.reflections.get(filename, None),
+                eval(self.timeFrame.startTimeVar.get()), eval(self.timeFrame.timeVar.get()),
+                type(self.graph))
+
+
+    def _waitForFile(self, future, job, filename, timeReset):
+        """initializes the file when it is loaded in the worker thread - the file is loaded
+        again if settings changed since the loading started"""
+        if future is not self.loading:
+            return # other file was selected in the meantime
+        if not future.done():
+            self.after(25, self._waitForFile, future, job, filename, timeReset)
+            return
+        if job != self._loadingJob(filename):
+            self.initializeFile(filename, new = True, timeReset = timeReset)
+            return
+        self.loading = None
+
+        try:
+            self.cm, self.prepared = future.result()
+        except Exception as e:
+            if optionGet("Developer", False, 'bool', True):
+                print(e)
+            self.status.set("File failed to load!")
+            self.bell()
+            return
+        self.initializeFile(filename, new = False, timeReset = timeReset)
+        if timeReset:
             self.curTime.set(0)
-            self.timeVar.set(self._timeFormat(self.minTime))  
+            self.timeVar.set(self._timeFormat(self.minTime))
+            if not self.animate:
+                self.stopFun()
+                self.playFun()
+        elif not self.showTrackVar.get():
+            self.changedTime(value = self.curTime.get(), unit = "0-100")
+
+        self._prefetch()
+
+
+    def destroy(self):
+        "stops loading of files in the worker thread"
+        self.loader.shutdown(wait = False, cancel_futures = True)
+        super().destroy()
+
+
+    def _prefetch(self):
+        "loads files next to the selected file in the worker thread"
+        files = self.fileFrame.files
+        index = self.fileFrame.index
+        neighbours = {files[i] for i in (index + 1, index - 1) if 0 <= i < len(files)}
+        prefetched = {}
+        for filename, (job, future) in self.prefetched.items():
+            if filename in neighbours and job == self._loadingJob(filename):
+                prefetched[filename] = (job, future)
+            else:
+                future.cancel()
+        for filename in neighbours - set(prefetched):
+            job = self._loadingJob(filename)
+            prefetched[filename] = (job, self.loader.submit(loadFile, *job))
+        self.prefetched = prefetched
 
 
     def _showComment(self, filename):
@@ -713,25 +845,6 @@ class Explorer(ttk.Frame):
             Comment(self.fileFrame, self.fileFrame.selected, True)
             
 
-    def _loadData(self, filename):
-        try:
-            if filename in self.fileStorage.pairedfiles:
-                self.cm = m.CL(filename, self.fileStorage.pairedfiles[filename])
-            else:
-                self.cm = m.CL(filename, "auto")
-            if self.removeReflectionsVar.get():
-                self.cm.removeReflections(points = self.fileStorage.reflections.get(filename,
-                                                                                    None))
-        except Exception as e:
-            if optionGet("Developer", False, 'bool', True):
-                print(e)
-            self.status.set("File failed to load!")
-            self.bell()
-            return False
-        else:
-            return True
-
-
     def _createShockSector(self):     
         if m.mode == "MWM":
             x = self.cm.platformX * self.scale + 20
@@ -759,45 +872,29 @@ class Explorer(ttk.Frame):
 
             
     def _drawTrack(self):
+        data = [line for line in self.cm.data if self.minTime <= line[1] <= self.maxTime]
         if m.mode in ("CM", "RA", "KT"):
-            data = [line[2:4] + line[6:9] for line in self.cm.data if
-                    self.minTime <= line[1] <= self.maxTime]
-            arena = []
-            room = []
-            prev = [-100, -100, 0, -100, -100]
-            last = 0
-            for count, line in enumerate(data):
-                if abs(line[0] - prev[0]) + abs(line[1] - prev[1]) > 2 or count - last == 25 or\
-                   line[2] > 0:
-                    room.append(line[0:2])
-                    arena.append(line[3:5])
-                    last = count
-                prev = line
+            roomX = [line[2] for line in data]
+            roomY = [line[3] for line in data]
+            arenaX = [line[7] for line in data]
+            arenaY = [line[8] for line in data]
 
             if m.mode in ("CM", "KT"):
-                self.roomCanv.create_line(([i * self.scale + 20 for line in room for i in line]),
+                self.roomCanv.create_line(polyline(roomX, roomY, self.scale, 20),
                                           fill = "black", width = 2)
             else:
-                self.arenaCanv.create_line(([i * self.scale + 20 for line in room for i in line]),
+                self.arenaCanv.create_line(polyline(roomX, roomY, self.scale, 20),
                                            fill = "green", width = 2)
-                self.roomCanv.create_line(([(i[0] - i[1]) * self.scale / 2 + 150 for line in
-                                            zip(arena, room) for i in zip(line[0], line[1])]),
+                self.roomCanv.create_line(polyline(list(map(sub, arenaX, roomX)),
+                                                   list(map(sub, arenaY, roomY)),
+                                                   self.scale / 2, 150),
                                           fill = "black", width = 2)
                 
-            self.arenaCanv.create_line(([i * self.scale + 20 for line in arena for i in line]),
+            self.arenaCanv.create_line(polyline(arenaX, arenaY, self.scale, 20),
                                        fill = "black", width = 2)      
         else:
-            displayThreshold = floor(3/self.scale)
-            data = [line[2:4] for line in self.cm.data if self.minTime <= line[1] <= self.maxTime]
-            points = []
-            prev = [-100, -100, 0, -100, -100]
-            last = 0
-            for count, line in enumerate(data):
-                if abs(line[0] - prev[0]) + abs(line[1] - prev[1]) > displayThreshold or count - last == 10:
-                    points.append(line)
-                    last = count
-                prev = line
-            self.roomCanv.create_line(([item*self.scale + 20 for line in points for item in line]),
+            self.roomCanv.create_line(polyline([line[2] for line in data],
+                                               [line[3] for line in data], self.scale, 20),
                                       fill = "black", width = 2)
         if m.mode in ("CM", "RA", "KT"):
             if self.showShocksVar.get():
@@ -862,11 +959,15 @@ class Explorer(ttk.Frame):
         self._setShockColor(curLine)
                 
 
-    def _setParameterDisplays(self, timeReset):
-        self.totDistanceVar.set(self.cm.getDistance(time = self.maxTime / 60000,
-                                                    startTime = self.minTime / 60000))
-        self.totEntrancesVar.set(self.cm.getEntrances(time = self.maxTime / 60000,
-                                                      startTime = self.minTime / 60000))
+    def _setParameterDisplays(self, timeReset, prepared):
+        if "distance" in prepared:
+            self.totDistanceVar.set(prepared["distance"])
+            self.totEntrancesVar.set(prepared["entrances"])
+        else:
+            self.totDistanceVar.set(self.cm.getDistance(time = self.maxTime / 60000,
+                                                        startTime = self.minTime / 60000))
+            self.totEntrancesVar.set(self.cm.getEntrances(time = self.maxTime / 60000,
+                                                          startTime = self.minTime / 60000))
 
         if self.selectedParameter.get():
             time = self.maxTime / 60000
@@ -1085,9 +1186,108 @@ class Explorer(ttk.Frame):
             self.speed.set(round(self.speed.get(), 0))
         else:
             self.speed.set(round(self.speed.get() * 5, -1) / 5)
-        
 
-                
+
+
+
+def loadFile(CL, filename, pairedfile, removeReflections, points, startTime, stopTime,
+             graphClass):
+    """loads a file and computes values shown when the file is selected in Explorer
+        - called in the worker thread of Explorer, therefore tkinter is not used
+        - returns the loaded object and a dictionary with the computed values"""
+    cm = CL(filename, pairedfile)
+    if removeReflections:
+        cm.removeReflections(points = points)
+
+    maxTime = min([cm.data[-1][1], stopTime * 60000])
+    minTime = max([cm.data[0][1], startTime * 60000])
+    prepared = {"track": cm.track, "window": (minTime, maxTime)}
+    # problems are not reported here - missing values are computed again in the main thread
+    try:
+        distance = cm.getDistance(time = maxTime / 60000, startTime = minTime / 60000)
+        entrances = cm.getEntrances(time = maxTime / 60000, startTime = minTime / 60000)
+        prepared.update(distance = distance, entrances = entrances)
+    except Exception:
+        pass
+    try:
+        computeSeries(graphClass, cm, minTime, maxTime) # stored with the track
+    except Exception:
+        pass
+    return cm, prepared
+
+
+
+class AnimationCursor:
+    """
+    current position of the animation in a track - keeps distance (in pixels) and number of
+        entrances from the start of the animation to the current time
+        - when the time moves forward, only rows between the previous and the current time are
+            processed, otherwise the rows are processed again from the start
+        - in tracks with sorted time stamps, any time is found using indices of the track
+    """
+    skip = 25
+
+    def __init__(self, cm, minTime):
+        self.cm = cm
+        self.track = cm.track
+        self.minTime = minTime
+        self.start = cm.findStart(minTime / 60000)
+        self.rewind()
+
+
+    def matches(self, cm, minTime):
+        "returns True if the cursor can be used for 'cm' and the start of the animation"
+        return cm is self.cm and cm.track is self.track and minTime == self.minTime
+
+
+    def rewind(self):
+        "returns the cursor to the start of the animation"
+        self.time = None
+        self.row = self.start
+        self.distance = 0
+        self.entrances = 0
+        self.prev = 0
+        self.x0, self.y0 = self.cm.data[0][self.cm.indices]
+
+
+    def moveTo(self, time):
+        """moves the cursor to 'time' (in miliseconds) and returns the current line - the first
+        row from the start of the animation with time stamp larger or equal to 'time'"""
+        window = self.cm.windowCursor(self.start, time, self.skip)
+        if window:
+            # rows before the time need not be processed when time stamps are sorted
+            stop, self.distance, self.entrances = window
+            return self.cm.data[stop]
+        if self.time is not None and time < self.time:
+            self.rewind()
+        self.time = time
+
+        track = self.track
+        times = track.time
+        states = track.columns[5]
+        xs, ys = track.columns[self.cm.indices]
+        start, skip = self.start, self.skip
+        for row in range(self.row, len(times)):
+            if times[row] < time:
+                # distance
+                if (row - start) % skip == 0:
+                    x1, y1 = xs[row], ys[row]
+                    self.distance += ((x1 - self.x0)**2 + (y1 - self.y0)**2)**0.5
+                    self.x0, self.y0 = x1, y1
+                # entrances
+                state = states[row]
+                if state == 2 and self.prev != 2:
+                    self.entrances += 1
+                    self.prev = 2
+                elif state == 0 and self.prev == 2:
+                    self.prev = 0
+            else:
+                self.row = row
+                return self.cm.data[row]
+        self.row = len(times)
+        return None
+
+
 
 class FileFrame(ttk.Frame):
     "displays files in ShowTracks class"
@@ -1201,9 +1401,6 @@ class FileFrame(ttk.Frame):
             self.checkTag()
             self.selected = self.files[self.index]
             self.root.initializeFile(self.files[self.index])
-            if not self.root.animate:
-                self.root.stopFun()
-                self.root.playFun()
 
 
     def doubleclick(self, event):
@@ -1224,9 +1421,6 @@ class FileFrame(ttk.Frame):
             self.selected = self.files[self.index]
             self.checkTag()
             self.root.initializeFile(self.files[self.index])
-            if not self.root.animate:
-                self.root.stopFun()
-                self.root.playFun()
 
 
     def nextFun(self):
@@ -1238,10 +1432,7 @@ class FileFrame(ttk.Frame):
             self.tree.see(str(self.index))
             self.selected = self.files[self.index]
             self.checkTag()
-            self.root.initializeFile(self.files[self.index])
-            if not self.root.animate:
-                self.root.stopFun()
-                self.root.playFun()           
+            self.root.initializeFile(self.files[self.index])           
             
 
     def orderByNames(self):
@@ -31,6 +31,7 @@ from optionget import optionGet
 from window import placeWindow
 from comment import Comment, commentColor
 from recognizefiles import recognizeFiles
+from headerindex import headers
 import mode as m
 
 
@@ -155,20 +156,14 @@ class FileStorage:
         fileStamp = {}
         pairs = []
 
+        read = headers(files)
         for file in files:
-            infile = open(file)
-            
-            for line in infile:
-                if "%Date.0" in line:
-                    date = line.split()[2]
-                elif "%Time.0" in line:
-                    time = line.split()[2]
-                elif "%ElapsedTime_ms.0" in line:
-                    elapsed = line.split()[2]
-                elif "%%END_HEADER" in line:
-                    break
-                
-            stamp = (date, time, elapsed)
+            header = read[file]
+            if header is None:
+                continue
+            stamp = (header.date, header.time, header.elapsed)
+            if None in stamp:
+                continue
             if stamp in fileStamp:
                 filepair = (fileStamp.pop(stamp), file)
                 pairs.append(filepair)
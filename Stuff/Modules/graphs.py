@@ -19,7 +19,10 @@ along with Carousel Maze Manager.  If not, see <http://www.gnu.org/licenses/>.
 
 from tkinter import *
 from tkinter import ttk
-from math import degrees, atan2, floor, ceil
+from math import degrees, atan2, floor, ceil, hypot, sqrt
+from itertools import compress, repeat, count
+from operator import sub, add, mul, truediv, mod, le, ge
+from array import array
 
 from optionget import optionGet
 import mode as m
@@ -40,6 +43,76 @@ def getGraphTypes():
     return types
 
 
+def computeSeries(graphClass, cm, minTime, maxTime):
+    """computes values depicted in a graph of the given class without creating the graph
+        - tkinter is not used, therefore it can be called outside of the main thread
+        - returns attributes which would be set by compute method of the graph
+        - the values are stored with the track, so they are computed only once for a time
+            window and they are shared by graphs in Explorer and in saved images"""
+    key = ("graph", graphClass.__name__, minTime, maxTime)
+    derived = cm.track.derived
+    if key not in derived:
+        series = _Series(minTime, maxTime)
+        graphClass.compute(series, cm)
+        derived[key] = {name: array("d", value) if isinstance(value, list) else value
+                        for name, value in vars(series).items()}
+    return derived[key]
+
+
+class _Series:
+    "holds values computed by computeSeries"
+    def __init__(self, minTime, maxTime):
+        self.minTime = minTime
+        self.maxTime = maxTime
+
+
+def _window(cm, minTime, maxTime, columns, cut = False):
+    """returns the columns of the track (as arrays) for rows from minTime with time stamps not
+    larger than maxTime
+        - if cut is True, the rows end before the first row with larger time stamp, otherwise
+            the rows with larger time stamps are just left out (it matters only when time stamps
+            are not sorted)"""
+    track = cm.track
+    start, stop = cm.findWindow(minTime / 60000, maxTime / 60000)
+    selected = [track.columns[column][start:stop] for column in columns]
+    inside = list(map(le, track.time[start:stop], repeat(maxTime)))
+    if not all(inside):
+        if cut:
+            selected = [column[:inside.index(False)] for column in selected]
+        else:
+            selected = [array(column.typecode, compress(column, inside)) for column in selected]
+    return selected
+
+
+def _distances(xs, ys, x, y):
+    "returns distances of points given by xs and ys from the point (x, y)"
+    return list(map(hypot, map(sub, xs, repeat(x)), map(sub, ys, repeat(y))))
+
+
+def downsample(values, step, first = 0):
+    """returns x coordinates and values of a line with values drawn 'step' pixels apart
+        - only the first, the minimum, the maximum and the last value of each pixel column are
+            kept, so the line looks the same, but it has at most four points per pixel
+        - the first value is drawn at position of the 'first'-th value of the graph"""
+    xs, ys = [], []
+    start = 0
+    while start < len(values):
+        column = floor((first + start) * step)
+        stop = max(start + 1, ceil((column + 1) / step) - first)
+        chunk = values[start:stop]
+        if len(chunk) > 4:
+            low = chunk.index(min(chunk))
+            high = chunk.index(max(chunk))
+            kept = sorted({0, low, high, len(chunk) - 1})
+        else:
+            kept = range(len(chunk))
+        for i in kept:
+            xs.append((first + start + i) * step)
+            ys.append(chunk[i])
+        start = stop
+    return xs, ys
+
+
 
 class Graphs(Canvas):
     "parent class for all 'wide' graphs in Explore page"
@@ -52,6 +125,7 @@ class Graphs(Canvas):
         self.width = width
         self.drawnParameter = None    
         self.parent = parent
+        self.downsampled = (None, None, []) # drawn values, width, downsampled lines
         
 
     def changedTime(self, newTime):
@@ -84,6 +158,11 @@ class Graphs(Canvas):
         self.drawParameter(cm = CM, parameter = self.drawnParameter)
 
 
+    def useSeries(self, cm):
+        "sets values depicted in the graph (see computeSeries)"
+        self.__dict__.update(computeSeries(type(self), cm, self.minTime, self.maxTime))
+
+
     def drawParameter(self, cm, parameter, purpose = "graph"):
         "computes selected parameter to be drawn on top of the graph"
         if self.drawnParameter and purpose == "graph":
@@ -282,18 +361,33 @@ class Graphs(Canvas):
                                  fill = "red", width = 1, tags = "parameter")
        
            
-    def drawGraph(self, maxY, valueList):
+    def drawGraph(self, maxY, valueList, wrapped = False):
         """draws lines on a canvas based on maxY and valueList parameters
         maxY parameter sets maximum value at y-axis
         valueList parameter must be a list containing successive values depicted in the graph
+        wrapped parameter means that neighbouring values 0 and maxY (in any order) are crossings
+            of the border, they are drawn at the same position and they are not connected
+        - values are downsampled for the width of the graph (see downsample), downsampled
+            values are computed again only when other values are drawn or the width changes
         """
-        maxX = len(valueList)
-        for i in range(maxX - 1):
-            x0 = (i / (maxX - 1)) * self.width
-            x1 = ((i + 1) / (maxX - 1)) * self.width
-            y0 = (1 - (valueList[i] / maxY)) * self.height
-            y1 = (1 - (valueList[i + 1] / maxY)) * self.height
-            self.create_line((x0, y0, x1, y1))
+        values, width, lines = self.downsampled
+        if values is not valueList or width != self.width:
+            lines = []
+            borders = ((0, maxY), (maxY, 0))
+            crossings = [i for i, pair in enumerate(zip(valueList, valueList[1:]), 1) if
+                         pair in borders] if wrapped else []
+            positions = len(valueList) - len(crossings)
+            if positions > 1:
+                step = self.width / (positions - 1)
+                for count, (start, stop) in enumerate(zip([0] + crossings,
+                                                          crossings + [len(valueList)])):
+                    lines.append(downsample(valueList[start:stop], step, start - count))
+            self.downsampled = (valueList, self.width, lines)
+
+        for xs, ys in lines:
+            if len(xs) > 1:
+                self.create_line([coordinate for x, y in zip(xs, ys) for coordinate in
+                                  (x, (1 - (y / maxY)) * self.height)])
         self.lift("timeMeasure")
  
 
@@ -316,7 +410,7 @@ class SvgGraph():
         "returns information about graph for saving in .svg file"
         self.maxTime = eval(self.parent.timeFrame.timeVar.get()) * 60000
         self.minTime = eval(self.parent.timeFrame.startTimeVar.get()) * 60000
-        self.compute(cm)
+        self.__dict__.update(computeSeries(type(self), cm, self.minTime, self.maxTime))
         self.writeFurtherText()
         return self.points, self.maxY, self.furtherText
 
@@ -391,34 +485,26 @@ class SpeedGraph(Graphs, SvgGraph):
            e.g. when skip = 12 and smooth = 2, speed is computed as an average of two speeds
                computed from lines separated by 11 lines
         """
-        indices = cm.indices
         resolution = cm.trackerResolution
 
         # saving speed between every 'skip' data point ... in centimeters per second
+        # - the last speed is computed from the first row with time stamp after the end
         start = cm.findStart(self.minTime / 60000)
-        self.speed = []
-        x0, y0 = cm.data[start][indices]
-        t0 = cm.data[start][1]
-        for line in cm.data[(start + skip)::skip]:
-            x1, y1 = line[indices]
-            t1 = line[1]
-            speed = ((((x1 - x0)**2 + (y1 - y0)**2)**0.5) / resolution) / ((t1 - t0) / 1000)
-            self.speed.append(speed)
-            if t1 >= self.maxTime:
-                break
-            x0, y0, t0 = x1, y1, t1
+        xs, ys = (column[start::skip] for column in cm.track.columns[cm.indices])
+        ts = cm.track.time[start::skip]
+        last = next(compress(count(1), map(ge, ts[1:], repeat(self.maxTime))), len(ts) - 1)
+        xs, ys, ts = xs[:last + 1], ys[:last + 1], ts[:last + 1]
+        dxs = list(map(sub, xs[1:], xs))
+        dys = list(map(sub, ys[1:], ys))
+        lengths = map(sqrt, map(add, map(mul, dxs, dxs), map(mul, dys, dys)))
+        durations = map(truediv, map(sub, ts[1:], ts), repeat(1000))
+        self.speed = list(map(truediv, map(truediv, lengths, repeat(resolution)), durations))
 
         # averaging speed across 'smooth' speed data points
-        self.points = []
-        avgSpeed = 0
-        for smoothCounter, point in enumerate(self.speed, 1):
-            avgSpeed += point
-            if smoothCounter % smooth == 0:
-                self.points.append((avgSpeed / smooth))
-                avgSpeed = 0
-        else:
-            if avgSpeed != 0:
-                self.points.append((avgSpeed / (smoothCounter % smooth)))
+        self.points = [sum(group) / smooth for group in zip(*[iter(self.speed)] * smooth)]
+        rest = len(self.speed) % smooth
+        if rest and sum(self.speed[-rest:]) != 0:
+            self.points.append(sum(self.speed[-rest:]) / rest)
 
         # computing maximum speed depicted on y-axis
         self.maxY = ceil(max(self.points) / 10) * 10
@@ -429,7 +515,7 @@ class SpeedGraph(Graphs, SvgGraph):
            parameter initTime is the time of the player when the graph is initialized
         """
         super().CM_loaded(cm, minTime, maxTime, initTime)
-        self.compute(cm)
+        self.useSeries(cm)
 
         for y in range(1, floor(self.maxY / 10)):
             self.create_line((0, y*10 * self.height / self.maxY, self.width,
@@ -469,23 +555,24 @@ class DistanceFromCenterGraph(Graphs, SvgGraph):
         """computes distances from center of the graph
            parameter smooth controls how many data points should be averaged
         """
-        start = cm.findStart(self.minTime / 60000)
-
         self.radius = cm.radius
         self.resolution = cm.trackerResolution
         Cx, Cy = cm.centerX, cm.centerY
 
         if m.mode == "RA":
-            dists = [((line[7] - Cx)**2 + (line[8] - Cy)**2)**0.5 for line in cm.data[start:] if
-                     line[1] <= self.maxTime]
+            xs, ys = _window(cm, self.minTime, self.maxTime, (7, 8))
+            dists = _distances(xs, ys, Cx, Cy)
         elif m.mode == "OF":
             r = self.radius
             lb, tb, rb, bb = Cx - r, Cy + r, Cx + r, Cy - r 
-            dists = [r - min([line[2]-lb, rb-line[2], line[3]-bb, tb-line[3]]) for line in
-                     cm.data[start:] if line[1] <= self.maxTime]    
+            xs, ys = _window(cm, self.minTime, self.maxTime, (2, 3))
+            dists = [r - min(sides) for sides in zip(map(sub, xs, repeat(lb)),
+                                                     map(sub, repeat(rb), xs),
+                                                     map(sub, ys, repeat(bb)),
+                                                     map(sub, repeat(tb), ys))]
         else:
-            dists = [((line[2] - Cx)**2 + (line[3] - Cy)**2)**0.5 for line in cm.data[start:] if
-                     line[1] <= self.maxTime]
+            xs, ys = _window(cm, self.minTime, self.maxTime, (2, 3))
+            dists = _distances(xs, ys, Cx, Cy)
 
         self.maxY = self.radius + 10
         self.points = dists
@@ -496,7 +583,7 @@ class DistanceFromCenterGraph(Graphs, SvgGraph):
            parameter initTime is the time of the player when the graph is initialized
         """
         super().CM_loaded(cm, minTime, maxTime, initTime)
-        self.compute(cm)
+        self.useSeries(cm)
         
         self.create_line((0, 10, self.width, 10), fill = "grey")
 
@@ -535,14 +622,12 @@ class DistanceFromPlatformGraph(Graphs, SvgGraph):
         """computes distances from center of the graph
            parameter smooth controls how many data points should be averaged
         """
-        start = cm.findStart(self.minTime / 60000)
-
         Cx, Cy = cm.centerX, cm.centerY
         Px, Py = cm.platformX, cm.platformY
         self.radius = cm.platformRadius
-           
-        self.points = [((line[2] - Px)**2 + (line[3] - Py)**2)**0.5 for line in cm.data[start:] if
-                       line[1] <= self.maxTime]
+
+        xs, ys = _window(cm, self.minTime, self.maxTime, (2, 3))
+        self.points = _distances(xs, ys, Px, Py)
 
         self.maxY = cm.radius + ((Px - Cx)**2 + (Py - Cy)**2)**0.5
         
@@ -552,7 +637,7 @@ class DistanceFromPlatformGraph(Graphs, SvgGraph):
            parameter initTime is the time of the player when the graph is initialized
         """
         super().CM_loaded(cm, minTime, maxTime, initTime)
-        self.compute(cm)
+        self.useSeries(cm)
 
         y = self.height * (1 - self.radius/self.maxY)
         color = "grey" if m.mode == "MWM" else "red"
@@ -570,12 +655,10 @@ class DistanceFromRobotGraph(DistanceFromPlatformGraph):
 
         
     def compute(self, cm, smooth = 10):
-        start = cm.findStart(self.minTime / 60000)
-
         self.radius = cm.sectorRadius
-           
-        self.points = [((line[7] - line[2])**2 + (line[8] - line[3])**2)**0.5
-                       for line in cm.data[start:] if line[1] <= self.maxTime]
+
+        ratX, ratY, robotX, robotY = _window(cm, self.minTime, self.maxTime, (7, 8, 2, 3))
+        self.points = list(map(hypot, map(sub, ratX, robotX), map(sub, ratY, robotY)))
 
         self.maxY = cm.radius * 2
     
@@ -593,35 +676,34 @@ class AngleGraph(Graphs, SvgGraph):
 
     def compute(self, cm):
         "computes angles of position relative to center"        
-        start = cm.findStart(self.minTime / 60000)
         Cx, Cy = cm.centerX, cm.centerY
         CA = cm.centerAngle
 
-        # saving angles to a list        
+        if m.mode == "RA":
+            ratX, ratY, robotX, robotY = _window(cm, self.minTime, self.maxTime, (7, 8, 2, 3),
+                                                 cut = True)
+            angles = map(atan2, map(sub, ratY, robotY),
+                         map(add, map(sub, robotX, ratX), repeat(0.000001)))
+            angles = map(add, map(degrees, angles), repeat(540))
+        else:
+            xs, ys = _window(cm, self.minTime, self.maxTime, (2, 3), cut = True)
+            angles = map(atan2, map(sub, repeat(Cy), ys),
+                         map(add, map(sub, xs, repeat(Cx)), repeat(0.000001)))
+            angles = map(sub, map(add, map(degrees, angles), repeat(720)), repeat(CA))
+        angles = list(map(mod, angles, repeat(360)))
+
+        # crossings of 0/360 are replaced by both borders, so that they are not drawn as lines
+        # across the whole graph
+        crossings = [i for i, prev, angle in zip(count(), [180] + angles, angles) if
+                     (prev > 270 and angle < 90) or (prev < 90 and angle > 270)]
         self.angles = []
-        nxt = False
-        prev = 180
-        self.crosses = 0
-        for line in cm.data[start:]:
-            if line[1] > self.maxTime:
-                break
-            else:
-                if m.mode == "RA":
-                    angle = (degrees(atan2(line[8] - line[3],
-                                           line[2] - line[7] + 0.000001)) + 540) % 360
-                else:
-                    angle = (degrees(atan2(Cy - line[3], line[2] - Cx + 0.000001)) + 720 - CA) % 360
-                if prev > 270 and angle < 90:
-                    self.angles.append(360)
-                    self.angles.append(0)
-                    self.crosses += 1
-                elif prev < 90 and angle > 270:
-                    self.angles.append(0)
-                    self.angles.append(360)
-                    self.crosses += 1
-                else:
-                    self.angles.append(angle)                
-                prev = angle        
+        last = 0
+        for i in crossings:
+            self.angles.extend(angles[last:i])
+            self.angles.extend((360, 0) if angles[i] < 90 else (0, 360))
+            last = i + 1
+        self.angles.extend(angles[last:])
+        self.crosses = len(crossings)
 
 
     def CM_loaded(self, cm, initTime = 0, minTime = 0, maxTime = "max"):
@@ -630,7 +712,7 @@ class AngleGraph(Graphs, SvgGraph):
         """
         super().CM_loaded(cm, minTime, maxTime, initTime)
         
-        self.compute(cm)
+        self.useSeries(cm)
 
         # drawing lines representing the sector
         if "CM" in m.mode or "KT" in m.mode:
@@ -641,23 +723,7 @@ class AngleGraph(Graphs, SvgGraph):
             self.create_line((0, y2, self.width, y2), fill = "red")
 
         # drawing the graph
-        maxX = len(self.angles) - self.crosses
-
-        i = 0
-        prev = self.angles[0]
-        for angle in self.angles[1:]:
-            x0 = (i / (maxX - 1)) * self.width
-            x1 = ((i + 1) / (maxX - 1)) * self.width
-            y0 = (1 - (prev / 360)) * self.height
-            y1 = (1 - (angle / 360)) * self.height
-            if (prev == 0 and angle == 360) or (prev == 360 and angle == 0):
-                prev = angle
-                continue
-            prev = angle
-            self.create_line((x0, y0, x1, y1))
-            i += 1
-            
-        self.lift("timeMeasure")
+        self.drawGraph(maxY = 360, valueList = self.angles, wrapped = True)
 
 
     def saveGraph(self, cm):
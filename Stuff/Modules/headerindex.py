@@ -0,0 +1,95 @@
+"""
+Copyright 2013 Štěpán Bahník
+
+This file is part of Carousel Maze Manager.
+
+Carousel Maze Manager is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Carousel Maze Manager is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Carousel Maze Manager.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import os
+
+
+# information from headers of data files - values are strings as written in the header (e.g.
+# date "13.2.2013", center "127 127"), None if the header does not contain them
+Header = namedtuple("Header", ["date", "time", "elapsed", "tracker", "center", "diameter",
+                               "resolution"])
+
+_keys = {"%Date.0": "date", "%Time.0": "time", "%ElapsedTime_ms.0": "elapsed",
+         "%TrackerVersion.0": "tracker", "%ArenaCenterXY.0": "center",
+         "%ArenaDiameter_m.0": "diameter", "%TrackerResolution_PixPerCM.0": "resolution"}
+
+# headers are read in blocks of this size, at most 'limit' bytes are read from a file
+blockSize = 4096
+limit = 65536
+
+# number of files read at once
+threads = 8
+
+
+# headers already read - keys are (file, size, time of modification), so that a changed file is
+# read again
+_index = {}
+_lock = threading.Lock()
+
+
+def readHeader(file):
+    "returns Header of a file - only the header is read from the file"
+    text = b""
+    with open(file, mode = "rb") as infile:
+        while len(text) < limit:
+            block = infile.read(blockSize)
+            text += block
+            if not block or b"%%END_HEADER" in text:
+                break
+    values = dict.fromkeys(Header._fields)
+    for line in text.decode("latin-1").splitlines():
+        if "%%END_HEADER" in line:
+            break
+        items = line.split()
+        if items and items[0] in _keys and "(" in items and ")" in items:
+            values[_keys[items[0]]] = " ".join(items[items.index("(") + 1:items.index(")")])
+    return Header(**values)
+
+
+def header(file):
+    "returns Header of a file from the index - it is read only if the file changed or is new"
+    info = os.stat(file)
+    key = (os.path.abspath(file), info.st_size, info.st_mtime_ns)
+    with _lock:
+        if key in _index:
+            return _index[key]
+    read = readHeader(file)
+    with _lock:
+        _index[key] = read
+    return read
+
+
+def _safeHeader(file):
+    try:
+        return header(file)
+    except OSError:
+        return None
+
+
+def headers(files):
+    """returns {file: Header} for all files (None for files which cannot be read) - headers
+    are read in more threads"""
+    files = list(files)
+    if len(files) < 2:
+        return {file: _safeHeader(file) for file in files}
+    with ThreadPoolExecutor(min(threads, len(files))) as executor:
+        return dict(zip(files, executor.map(_safeHeader, files)))
@@ -0,0 +1,139 @@
+"""
+Copyright 2013 Štěpán Bahník
+
+This file is part of Carousel Maze Manager.
+
+Carousel Maze Manager is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Carousel Maze Manager is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Carousel Maze Manager.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+# processing of files from command line without GUI (tkinter is not imported), e.g.:
+#   python "Stuff/Modules/headless.py" CM data/*_Arena.dat -p "Total distance" Entrances
+#       -t 0-10 10-20 -o results.csv
+#   - options (directories, separator, parameter options etc.) are the same as in GUI
+#   - parameters selected as default are used when no parameter is given
+#   - more time windows are processed as batch time
+
+import argparse
+import os
+import sys
+
+
+def main(args = None):
+    "processes files given by command line arguments and returns exit status"
+    modules = os.path.dirname(os.path.abspath(__file__))
+    if modules not in sys.path:
+        sys.path.append(modules)
+
+    # names of files are relative to the current directory, but options etc. are found relative
+    # to the working directory, which has to be the program directory
+    current = os.getcwd()
+    os.chdir(os.path.dirname(os.path.dirname(modules)))
+
+    # imported after the change of the working directory, because some modules use it on import
+    import mode as m
+    from optionget import optionGet
+    from recognizefiles import recognizeFiles
+    from batch import Batch, StoredFiles, loadFiles
+
+    parser = argparse.ArgumentParser(description = "Processes files without GUI.")
+    parser.add_argument("mode", choices = list(m.fullname.keys()))
+    parser.add_argument("files", nargs = "*", help = "files for processing")
+    parser.add_argument("-f", "--filestorage", help = "saved .files file with files")
+    parser.add_argument("-o", "--output", required = True, help = "file for results")
+    parser.add_argument("-p", "--parameters", nargs = "+", metavar = "PARAMETER",
+                        help = "names of parameters (default parameters if omitted)")
+    parser.add_argument("-t", "--time", nargs = "+", metavar = "START-END",
+                        help = "time windows in minutes (default time if omitted)")
+    parser.add_argument("--process", default = "all files",
+                        choices = ["all files", "only tagged", "only untagged"])
+    parser.add_argument("--reflections", default = "no files", help = "remove reflections in",
+                        choices = ["no files", "tagged files", "untagged files", "all files"])
+    parser.add_argument("--tags", action = "store_true", help = "save tags")
+    parser.add_argument("--comments", action = "store_true", help = "save comments")
+    parser.add_argument("-j", "--processes", type = int, default = None,
+                        help = "number of processes used for computation")
+    args = parser.parse_args(args)
+
+    files = [os.path.join(current, file) for file in args.files]
+    filestorage = os.path.join(current, args.filestorage) if args.filestorage else None
+    output = os.path.join(current, args.output)
+
+    m.changeMode(args.mode)
+
+    dirname = os.path.join(os.getcwd(), "Stuff", "Logs")
+    if not os.path.exists(dirname):
+        os.mkdir(dirname)
+
+    # files
+    if filestorage:
+        fileStorage = loadFiles(filestorage)
+        if fileStorage.mode != m.mode:
+            print("Warning: files were saved in a different mode ({}).".format(
+                fileStorage.mode), file = sys.stderr)
+    else:
+        wrong, arenafiles = recognizeFiles(files)
+        for file in wrong:
+            print("Warning: no matching file for {}.".format(file), file = sys.stderr)
+        fileStorage = StoredFiles(arenafiles)
+    if not len(fileStorage):
+        parser.error("there is no file for processing")
+
+    # parameters
+    if args.parameters:
+        names = args.parameters
+        for name in names:
+            if name not in m.parameters:
+                parser.error("unknown parameter: {}".format(name))
+    else:
+        names = [name for name in m.parameters if
+                 optionGet("Def" + name.replace(" ", ""), False, "bool")]
+
+    # time
+    batchTime = None
+    if args.time:
+        try:
+            windows = [tuple(float(time) for time in window.split("-")) for window in args.time]
+        except ValueError:
+            parser.error("time has to be given as START-END in minutes")
+        if any(len(window) != 2 or window[0] >= window[1] for window in windows):
+            parser.error("start time must be smaller than stop time")
+        if len(windows) == 1:
+            startTime, time = windows[0]
+        else:
+            startTime, time = windows[0][0], windows[-1][1]
+            batchTime = [tuple(int(time) if time.is_integer() else time for time in window)
+                         for window in windows]
+    else:
+        startTime = optionGet("DefStartTime", 0, ['int', 'float'])
+        time = optionGet("DefStopTime", m.time[m.mode], ['int', 'float'])
+
+    processes = args.processes or optionGet("ProcessorProcesses", 1, "int", True)
+
+    batch = Batch(fileStorage, names, startTime, time, output, batchTime = batchTime,
+                  processWhat = args.process, removeReflectionsWhere = args.reflections,
+                  saveTags = args.tags, saveComments = args.comments)
+    if not batch.files:
+        parser.error("there is no file selected for processing")
+    batch.run(processes)
+
+    print("{} files processed, results saved in {}".format(len(batch.files), batch.output))
+    if batch.someProblem:
+        print("Some problem occured during processing. See log for details: " +
+              batch.log.filename, file = sys.stderr)
+        return 1
+    return 0
+
+
+
+if __name__ == "__main__": sys.exit(main())
@@ -30,6 +30,7 @@ from optionwrite import optionWrite
 from graphs import getGraphTypes, Graphs, SvgGraph, SpeedGraph, DistanceFromCenterGraph
 from graphs import AngleGraph, DistanceFromPlatformGraph, DistanceFromRobotGraph
 from window import placeWindow
+from simplify import polyline
 import mode as m
 
 
@@ -282,22 +283,25 @@ class SVG():
 
         track += '<polyline points="'        
 
-        prev = (0, 0)
+        xs = []
+        ys = []
         shock = False
         shockPositions = []
         for line in self.cm.data[start:]:
             if line[1] > time:
                 break
             positions = line[indices]
-            if positions != prev:
-                track += ",".join(map(str, positions)) + " "
+            xs.append(positions[0])
+            ys.append(positions[1])
             if line[6] > 0:
                 if not shock:
                     shock = True
                     shockPositions.append(positions)
             else:
                 shock = False                        
-            prev = positions
+
+        points = polyline(xs, ys, tolerance = 0.5 / self.scale)
+        track += " ".join(",".join(map(str, points[i:i + 2])) for i in range(0, len(points), 2))
 
         track += '" style = "fill:none;stroke:black"/>\n'
 
@@ -20,14 +20,15 @@ along with Carousel Maze Manager.  If not, see <http://www.gnu.org/licenses/>.
 # probably delete
 from math import degrees, atan2, sin, cos, pi, radians, sqrt, ceil
 from collections import deque, OrderedDict, defaultdict
+from array import array
 import os
 from funcs import median
 
 
-from collections import OrderedDict
-
-
 from cmsf import CMSF
+from track import Track
+import diskcache
+import trackcache
 
 
 
@@ -48,49 +49,53 @@ class KT(CMSF):
         - current level is in miliamperes
         - time stamp is in miliseconds
     """
-    cache = OrderedDict()
-
     def __init__(self, nameA, *_):
 
         self.nameA = nameA
-        self.data = []
         self.interpolated = set()
         self.indices = slice(2,4)
         self.processArena = False
 
         # in cache?
-        if self.nameA in KT.cache:
-            self.__dict__ = KT.cache[self.nameA]
+        cached = trackcache.get(("KT", self.nameA))
+        if cached:
+            self.__dict__ = cached
             return
 
-        # processing data from arena frame
-        with open(self.nameA, "r") as infile:
-            self.width = 60
-            self.centerAngle = 0
-            self._processHeader(infile)
-            self._processRoomFile(infile)
-
-        if self.processArena:
+        # stored on disk?
+        stamp = diskcache.stamp(self.nameA)
+        stored = diskcache.load("KT", stamp)
+        if stored:
+            self.__dict__ = stored
+        else:
+            # processing data from arena frame
             with open(self.nameA, "r") as infile:
-                self._processArenaFile(infile)
+                self.width = 60
+                self.centerAngle = 0
+                self._processHeader(infile)
+                self._processRoomFile(infile)
+
+            if self.processArena:
+                with open(self.nameA, "r") as infile:
+                    self._processArenaFile(infile)
+
+            # discards missing points from beginning of self.data
+            self._correctMissingFromBeginning()
+
+            # exception used for example when all lines are wrong (all positions are 0, 0)
+            if not self.data:
+                raise Exception("Failure in data initialization.")
 
-        # discards missing points from beginning of self.data
-        self._correctMissingFromBeginning()
-          
-        # exception used for example when all lines are wrong (all positions are 0, 0)
-        if not self.data:
-            raise Exception("Failure in data initialization.")
+            self.stamp = stamp
+            diskcache.save("KT", stamp, self.__dict__)
 
         # caching
-        KT.cache[self.nameA] = self.__dict__
-        if len(KT.cache) > 15:
-            KT.cache.popitem(last = False)
+        trackcache.put(("KT", self.nameA), self.__dict__)
 
      
 
-    def _cacheRemoval(self):
-        if self.nameA in KT.cache:
-            KT.cache.pop(self.nameA) 
+    def _cacheKey(self):
+        return ("KT", self.nameA)
 
 
   
@@ -174,6 +179,30 @@ class KT(CMSF):
             line[3] = line[3] - self.minY
         line = list(map(int, line))
         return line
+
+
+    def _evaluateColumns(self, lines, endsplit):
+        """evaluates a block of lines at once - the result is the same as from _evaluateLine
+            - only positions are converted to floats, other used columns are converted to
+                integers directly if possible
+        """
+        lines = "\n".join(lines).replace("-1", "0").split("\n")
+        columns = self._splitColumns(lines)
+        used = list(range(len(columns)))
+        if self.inArena:
+            used[2:4] = used[self.indicesA]
+        used = used[:endsplit]
+
+        # items of columns which are not used have to be numbers as well
+        for index in set(range(len(columns))).difference(used):
+            deque(map(float, columns[index]), maxlen = 0)
+
+        xs, ys = [list(map(float, columns[index])) for index in used[2:4]]
+        minX, minY = self.minX, self.minY
+        values = [_integers(columns[index]) for index in used[:2] + used[4:]]
+        values[2:2] = [[int(x - minX) if x != 0 else 0 for x in xs],
+                       [int(y - minY) if x != 0 else int(y) for x, y in zip(xs, ys)]]
+        return [array(code, column) for code, column in zip(Track.typecodes, values)]
         
 
     def _removalCondition(self, row, i, before, reflection):
@@ -190,9 +219,6 @@ class KT(CMSF):
                     self._computeSpeed(before, self.data[row + i]),
                     row + i in self.interpolated))
 
-    def _cacheRemoval(self):
-        if self.nameA in KT.cache:
-            KT.cache.pop(self.nameA)      
     def removeReflections(self, *args, bothframes = False, **kwargs):
         super().removeReflections(*args, bothframes = bothframes, **kwargs)
 
@@ -207,6 +233,15 @@ class KT(CMSF):
             
 
 
+def _integers(column):
+    "returns items of a column as integers - they are truncated if they are written as floats"
+    try:
+        return list(map(int, column))
+    except ValueError:
+        return list(map(int, map(float, column)))
+
+
+
 def main():
     filename = os.path.join(r"C:\Users\Štěpán\Desktop\CM Manager\CM_Manager_0_5_0\d01", "d01rat01_ARENA.dat")
     kt = KT(filename)
@@ -29,7 +29,7 @@ from explorer import Explorer
 from processor import Processor
 from options import OptionsCM, AdvancedOptions, GeneralOptions
 from optionwrite import optionWrite
-from optionget import optionGet
+from optionget import optionGet, options
 from helpcmm import HelpCM
 from tools import saveFileStorage, loadFileStorage, addTags
 from showtracks import ShowTracks
@@ -141,6 +141,7 @@ class MenuCM(Menu):
         filename = os.path.join(os.getcwd(), "Stuff", "Options.txt")
         if answ and os.path.exists(filename):
             os.remove(filename)     
+            options.load(filename)
 
     def helpCM(self):
         try:
@@ -22,29 +22,38 @@ from math import degrees, sqrt, cos, sin, radians
 
 from cm import CM
 from singleframe import SF
+import diskcache
 
 
 class MWM(SF, CM):
     def __init__(self, nameA, *_):
 
         self.nameA = nameA
-        self.data = []
         self.interpolated = set()
         self.indices = slice(2,4)
 
-        # processing data from arena frame
-        with open(self.nameA, "r") as infile:
-            self._processHeader(infile)
-            self.centerAngle = (degrees(self._angle(self.platformX, self.platformY)) + 360) % 360
-            endsplit = 6 if self.tracker == "Tracker" else 7
-            self._processRoomFile(infile, endsplit = endsplit)
+        # stored on disk?
+        stamp = diskcache.stamp(self.nameA)
+        stored = diskcache.load("MWM", stamp)
+        if stored:
+            self.__dict__ = stored
+        else:
+            # processing data from arena frame
+            with open(self.nameA, "r") as infile:
+                self._processHeader(infile)
+                self.centerAngle = (degrees(self._angle(self.platformX, self.platformY)) + 360) % 360
+                endsplit = 6 if self.tracker == "Tracker" else 7
+                self._processRoomFile(infile, endsplit = endsplit)
 
-        # discards missing points from beginning of self.data
-        self._correctMissingFromBeginning()
-          
-        # exception used for example when all lines are wrong (all positions are 0, 0)
-        if not self.data:
-            raise Exception("Failure in data initialization.")
+            # discards missing points from beginning of self.data
+            self._correctMissingFromBeginning()
+
+            # exception used for example when all lines are wrong (all positions are 0, 0)
+            if not self.data:
+                raise Exception("Failure in data initialization.")
+
+            self.stamp = stamp
+            diskcache.save("MWM", stamp, self.__dict__)
 
 
     def _addReinforcedSector(self, string, position):
@@ -60,20 +69,20 @@ class MWM(SF, CM):
         argument 'lastTime' decides whether the last time point is obtained from 'time' parameter
             or data
         """
-        start = self.findStart(startTime)
+        start, stop = self.findWindow(startTime, time)
         time *= 60000 # conversion from minutes to miliseconds
         startTime *= 60000
         T1 = 0
-        for content in self.data[start:]:
-            if content[5] < 2:
+        for state, t in zip(self.track.columns[5][start:stop], self.track.time[start:stop]):
+            if state < 2:
                 continue
-            elif content[5] in [2, 3]:
-                T1 = content[1] - startTime
+            elif state in [2, 3]:
+                T1 = t - startTime
                 break
             
         if T1 == 0 or T1 > time - startTime:
             if lastTime == "fromData": # not used - may be added as an option in the future
-                T1 = min(time, self.data[-1][1]) - startTime
+                T1 = min(time, self.track.time[-1]) - startTime
             elif lastTime == "fromParameter":
                 T1 = time - startTime
                 
@@ -88,19 +97,19 @@ class MWM(SF, CM):
         argument 'lastTime' decides whether the last time point is obtained from 'time' parameter
             or data
         """
+        start, stop = self.findWindow(startTime, time)
         time = time * 60000 # conversion from minutes to miliseconds
-        start = self.findStart(startTime)
         T1 = 0
-        for content in self.data[start:]:
-            if content[5] == 0:
+        for state, t in zip(self.track.columns[5][start:stop], self.track.time[start:stop]):
+            if state == 0:
                 continue
-            elif content[5] > 0 and content[5] != 5:
-                T1 = content[1] - startTime
+            elif state > 0 and state != 5:
+                T1 = t - startTime
                 break
             
         if T1 == 0 or T1 > time - startTime:
             if lastTime == "fromData": # not used - may be added as an option in the future
-                T1 = min(time, self.data[-1][1]) - startTime
+                T1 = min(time, self.track.time[-1]) - startTime
             elif lastTime == "fromParameter":
                 T1 = time - startTime
                 
@@ -114,34 +123,36 @@ class MWM(SF, CM):
         argument 'lastTime' decides whether the last time point is obtained from 'time' parameter
             or data
         """
+        start, stop = self.findWindow(startTime, time)
         time = time * 60000 # conversion from minutes to miliseconds
-        start = self.findStart(startTime)
         T1 = 0
         x, y = self.platformX, self.platformY
         passTime = None
-        for content in self.data[start:]:
-            if content[5] == 0:
+        track = self.track
+        for t, ratX, ratY, state in zip(*[column[start:stop] for column in track.columns[1:4] +
+                                          track.columns[5:6]]):
+            if state == 0:
                 if passTime:
-                    distanceToTarget = sqrt((content[2] - x)**2 + (content[3] - y)**2)
+                    distanceToTarget = sqrt((ratX - x)**2 + (ratY - y)**2)
                     if distanceToTarget < self.platformRadius * platformAdjustment:
-                        if content[1] - passTime >= self.entranceLatency:               
-                            T1 = content[1] - startTime                
+                        if t - passTime >= self.entranceLatency:               
+                            T1 = t - startTime                
                             break
                     else:
                         passTime = None
-            elif content[5] in [2, 3]:
-                T1 = content[1] - startTime
+            elif state in [2, 3]:
+                T1 = t - startTime
                 break
-            elif content[5] == 1:
+            elif state == 1:
                 if not passTime:
-                    passTime = content[1]
-                elif content[1] - passTime >= self.entranceLatency:               
-                    T1 = content[1] - startTime                
+                    passTime = t
+                elif t - passTime >= self.entranceLatency:               
+                    T1 = t - startTime                
                     break
             
         if T1 == 0 or T1 > time - startTime:
             if lastTime == "fromData": # not used - may be added as an option in the future
-                T1 = min(time, self.data[-1][1]) - startTime
+                T1 = min(time, track.time[-1]) - startTime
             elif lastTime == "fromParameter":
                 T1 = time - startTime
                 
@@ -153,24 +164,24 @@ class MWM(SF, CM):
         """computes number of entrances,
         argument 'time' is time of the session
         """
+        start, stop = self.findWindow(startTime, time)
         time *= 60000
-        start = self.findStart(startTime)
         passes = 0
         prev = 0
-        for content in self.data[start:]:
-            if content[5] == 0 and prev != 2 and content[1] <= time:
+        for state, t in zip(self.track.columns[5][start:stop], self.track.time[start:stop]):
+            if state == 0 and prev != 2 and t <= time:
                 continue
-            elif content[5] == 0 and prev == 2 and content[1] <= time:
-                if content[5] == 0: 
+            elif state == 0 and prev == 2 and t <= time:
+                if state == 0: 
                     prev = 0
                 continue
-            elif content[5] > 0 and content[5] != 5 and prev == 2 and content[1] <= time:
+            elif state > 0 and state != 5 and prev == 2 and t <= time:
                 continue
-            elif content[5] > 0 and content[5] != 5 and prev != 2 and content[1] <= time:
+            elif state > 0 and state != 5 and prev != 2 and t <= time:
                 passes += 1
                 prev = 2
                 continue
-            elif content[1] > time:
+            elif t > time:
                 break
         return passes
 
@@ -178,46 +189,51 @@ class MWM(SF, CM):
     def getAvgDistance(self, time = 1, startTime = 0, x = "platform", y = "platform",
                        removeBeginning = False, skip = 1, minDifference = 0):
 
+        start, stop = self.findWindow(startTime, time)
         time *= 60000 # conversion from minutes to miliseconds
-        start = self.findStart(startTime)
 
         x = self.platformX if x == "platform" else x
         y = self.platformY if y == "platform" else y
+        track = self.track
 
         if removeBeginning:
             # pravdepodobne muze pouzivat time to first pass
             T1 = 0
-            for content in self.data[start:]:
-                if not 0 < content[5] < 3:
+            for state, t in zip(track.columns[5][start:stop], track.time[start:stop]):
+                if not 0 < state < 3:
                     continue
                 else:
-                    T1 = content[1] - startTime
+                    T1 = t - startTime
                     break
             if T1 == 0 or T1 > time - startTime:
-                T1 = min(time, self.data[-1][1]) - startTime
+                T1 = min(time, track.time[-1]) - startTime
             beginning = self.realMinimumTime() / 60000 # min
             t = min([time, T1]) # ms
             distance = self.getDistance(skip = skip, time = t / 60000, startTime = beginning,
                                         minDifference = minDifference) # m
             speed = float(distance) * self.trackerResolution * 100 / (t - beginning*60000) # pix/ms
-            distanceToTarget = sqrt((self.data[0][2] - x)**2 + (self.data[0][3] - y)**2)
+            distanceToTarget = sqrt((track.columns[2][0] - x)**2 + (track.columns[3][0] - y)**2)
             distanceToTarget -=  self.platformRadius # pix
             timeToReachTarget = distanceToTarget / (speed * 60000) # min
             start = self.findStart(max([timeToReachTarget + beginning, startTime]))
+            stop = max(start, stop)
             
         sumDistance = 0
         
-        for content in self.data[start:]:
-            if content[1] > time:
+        for frame, t, ratX, ratY in zip(*[column[start:stop] for column in track.columns[0:4]]):
+            if t > time:
                 break
-            currentDistance = sqrt((content[2] - x)**2 + (content[3] - y)**2) - self.platformRadius
+            currentDistance = sqrt((ratX - x)**2 + (ratY - y)**2) - self.platformRadius
             if currentDistance > 0:
                 sumDistance += currentDistance
                 
-        if not self.data[start:]:
+        if start >= len(track):
             return "NA"
+        if stop < len(track):
+            # the first row after the window is counted in the number of rows
+            frame = track.frame[stop]
         
-        averageDistance = sumDistance / (content[0] - start)       
+        averageDistance = sumDistance / (frame - start)       
         averageDistance /= self.trackerResolution # conversion to centimetres
         
         return format(averageDistance, "0.2f")
@@ -254,9 +270,9 @@ class MWM(SF, CM):
                     row + i in self.interpolated))
     
 
-    def _cacheRemoval(self):
-        "overrides CM method, MWM has no cache"
-        pass
+    def _cacheKey(self):
+        "loaded MWM data are not kept in trackcache, only cleaned data are stored there"
+        return ("MWM", self.nameA)
 
     def removeReflections(self, *args, bothframes = False, **kwargs):
         super().removeReflections(*args, bothframes = bothframes, **kwargs)
@@ -23,74 +23,79 @@ from math import degrees
 
 from cm import CM
 from singleframe import SF
+import diskcache
+import trackcache
 
 
 class OF(SF, CM):
-    cache = OrderedDict()
-    
     def __init__(self, nameA, *_):
 
         self.nameA = nameA
-        self.data = []
         self.interpolated = set()
         self.indices = slice(2,4)
        
         # in cache?
-        if self.nameA in OF.cache:
-            self.__dict__ = OF.cache[self.nameA]
+        cached = trackcache.get(("OF", self.nameA))
+        if cached:
+            self.__dict__ = cached
             return
 
-        # processing data from arena frame
-        with open(self.nameA, "r") as infile:
-            self._processHeader(infile)
-            self.centerAngle = 0
-            self._processRoomFile(infile)
+        # stored on disk?
+        stamp = diskcache.stamp(self.nameA)
+        stored = diskcache.load("OF", stamp)
+        if stored:
+            self.__dict__ = stored
+        else:
+            # processing data from arena frame
+            with open(self.nameA, "r") as infile:
+                self._processHeader(infile)
+                self.centerAngle = 0
+                self._processRoomFile(infile)
 
-        # discards missing points from beginning of self.data
-        self._correctMissingFromBeginning()
-          
-        # exception used for example when all lines are wrong (all positions are 0, 0)
-        if not self.data:
-            raise Exception("Failure in data initialization.")
+            # discards missing points from beginning of self.data
+            self._correctMissingFromBeginning()
 
-        # caching
-        OF.cache[self.nameA] = self.__dict__
-        if len(OF.cache) > 15:
-            OF.cache.popitem(last = False)
+            # exception used for example when all lines are wrong (all positions are 0, 0)
+            if not self.data:
+                raise Exception("Failure in data initialization.")
 
+            self.stamp = stamp
+            diskcache.save("OF", stamp, self.__dict__)
+
+        # caching
+        trackcache.put(("OF", self.nameA), self.__dict__)
 
-    def countOutsidePoints(self, time = 20, startTime = 0, distance = 1):
-        time *= 60000
-        start = self.findStart(startTime)
 
+    def _outside(self, distance):
+        "the arena is a square - returns whether positions are farther than 'distance' from it"
         Cx, Cy = self.centerX, self.centerY        
         r = self.radius
         lb, tb, rb, bb = Cx - r, Cy + r, Cx + r, Cy - r
         distance = -distance
 
-        outside = [1 for line in self.data[start:] if line[1] <= time and
-                   min([line[2]-lb, rb-line[2], line[3]-bb, tb-line[3]]) < distance]  
-
-        return sum(outside)
+        xs, ys = self.track.columns[2:4]
+        return (min([x-lb, rb-x, y-bb, tb-y]) < distance for x, y in zip(xs, ys))
 
 
     def getThigmotaxis(self, time = 20, startTime = 0, percentSize = 20):
+        start, stop = self.findWindow(startTime, time)
         time *= 60000
-        start = self.findStart(startTime)
         if type(percentSize) != list:
             percentSize = [percentSize]
 
         results = []
+        times = self.track.time[start:stop]
+        xs, ys = [column[start:stop] for column in self.track.columns[2:4]]
         for width in percentSize:
             centerArea = (1 - width/100) * self.radius
             x0, x1 = self.centerX - centerArea, self.centerX + centerArea
             y0, y1 = self.centerY - centerArea, self.centerY + centerArea
             center = 0
             periphery = 0
-            for content in self.data[start:]:
-                if x0 < content[2] < x1 and y0 < content[3] < y1 and content[1] <= time:
+            for t, x, y in zip(times, xs, ys):
+                if x0 < x < x1 and y0 < y < y1 and t <= time:
                     center += 1                       
-                elif content[1] <= time:
+                elif t <= time:
                     periphery += 1                       
                 else:
                     break
@@ -104,15 +109,16 @@ class OF(SF, CM):
 
 
     def getMeanDistanceFromSide(self, time = 20, startTime = 0):
+        start, stop = self.findWindow(startTime, time)
         time *= 60000
-        start = self.findStart(startTime)
 
         Cx, Cy = self.centerX, self.centerY        
         r = self.radius
         lb, tb, rb, bb = Cx - r, Cy + r, Cx + r, Cy - r
 
-        dists = [max((min((line[2]-lb, rb-line[2], line[3]-bb, tb-line[3])), 0)) for line in
-                 self.data[start:] if line[1] <= time]
+        xs, ys = self.track.columns[2:4]
+        dists = [max((min((x-lb, rb-x, y-bb, tb-y)), 0)) for t, x, y in
+                 zip(self.track.time[start:stop], xs[start:stop], ys[start:stop]) if t <= time]
 
         result = (sum(dists) / len(dists)) / self.trackerResolution
         
@@ -120,14 +126,15 @@ class OF(SF, CM):
 
 
     def getTimeInQuadrants(self, time = 20, startTime = 0, corner = True):
+        start, stop = self.findWindow(startTime, time)
         time *= 60000
-        start = self.findStart(startTime)
         sectorCenterAngle = 0 if not corner else 45
   
         angles = [0] * 4
-        for content in self.data[start:]:
-            if content[1] <= time:
-                angle = (degrees(self._angle(content[2], content[3])) -
+        xs, ys = self.track.columns[2:4]
+        for t, x, y in zip(self.track.time[start:stop], xs[start:stop], ys[start:stop]):
+            if t <= time:
+                angle = (degrees(self._angle(x, y)) -
                          sectorCenterAngle + 405) % 360
                 angles[int(angle // 90)] += 1
 
@@ -150,9 +157,8 @@ class OF(SF, CM):
                     self._computeSpeed(before, self.data[row + i]),
                     row + i in self.interpolated))
 
-    def _cacheRemoval(self):
-        if self.nameA in OF.cache:
-            OF.cache.pop(self.nameA) 
+    def _cacheKey(self):
+        return ("OF", self.nameA)
 
 
     def removeReflections(self, *args, bothframes = False, **kwargs):
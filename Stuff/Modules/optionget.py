@@ -17,11 +17,104 @@ You should have received a copy of the GNU General Public License
 along with Carousel Maze Manager.  If not, see <http://www.gnu.org/licenses/>.
 """
 
+from ast import literal_eval
+from copy import deepcopy
+from functools import lru_cache
+from time import monotonic
 import os
 
 import mode as m
 
 
+
+class Options:
+    """
+    options stored in file Options.txt in directory 'Stuff' in working directory
+        - the file is read only when it was changed (its modification time and size are
+            checked at most once per 'interval' seconds), otherwise options are read from memory
+        - values are kept as they are written in the file (i.e. as Python literals), each
+            option can have more values when it is written in the file more times
+    """
+    interval = 1
+
+    def __init__(self):
+        self.values = {}
+        self.filename = None
+        self.stamp = None
+        self.checked = 0
+
+
+    def get(self, option):
+        "returns values of the option written in the file"
+        filename = os.path.join(os.getcwd(), "Stuff", "Options.txt")
+        if filename != self.filename or monotonic() - self.checked > self.interval:
+            self.checked = monotonic()
+            if filename != self.filename or _stamp(filename) != self.stamp:
+                self.load(filename)
+        return self.values.get(option, ())
+
+
+    def load(self, filename = None):
+        "reads the options from the file"
+        if filename is None:
+            filename = os.path.join(os.getcwd(), "Stuff", "Options.txt")
+        stamp = _stamp(filename)
+        values = {}
+        if stamp:
+            with open(filename, mode = "r") as infile:
+                for line in infile:
+                    if line.startswith("%|"):
+                        end = line.find("|%", 2)
+                        if end != -1:
+                            values.setdefault(line[2:end], []).append(
+                                line[end + 2:].strip(" \t\n"))
+        self.values = values
+        self.filename = filename
+        self.stamp = stamp
+        self.checked = monotonic()
+
+
+
+def _stamp(filename):
+    "returns modification time and size of the file or None if it does not exist"
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+@lru_cache(maxsize = 1024)
+def _parse(text):
+    return literal_eval(text)
+
+
+def _literal(text):
+    """returns the value written as text - parsed values are cached, so values which can be
+    changed (e.g. lists) are copied before they are returned"""
+    value = _parse(text)
+    if isinstance(value, (int, float, complex, str, bytes, type(None))):
+        return value
+    return deepcopy(value)
+
+
+# conversions of values for names of types used in valueType
+_types = {"": lambda *value: value[0] if value else (), "str": str, "int": int, "float": float,
+          "bool": bool, "list": list, "tuple": tuple, "dict": dict, "set": set}
+
+
+def _convert(typ, text):
+    "returns the value written as text converted to the type, e.g. int('5') for 'int' and '5'"
+    if not text.strip():
+        return _types[typ]()
+    return _types[typ](_literal(text))
+
+
+# options used by all modules
+options = Options()
+
+
+
 def optionGet(option, default, valueType, general = False):
     """returns option if it exists and has right type (as specified by valueType parameter),
     otherwise returns default value
@@ -30,32 +123,28 @@ def optionGet(option, default, valueType, general = False):
     try:
         if not general:
             option = m.mode + option
-        optString = "%|" + option + "|%"
-        infile = open(os.path.join(os.getcwd(), "Stuff", "Options.txt"), mode = "r")
-
-        for line in infile:
-            if optString in line:
-                result = line[len(optString):].strip(" \t\n")
-                if type(valueType) == list:
-                    if ["float", "int"] == sorted(valueType):                       
+
+        for result in options.get(option):
+            if type(valueType) == list:
+                if ["float", "int"] == sorted(valueType):                       
+                    try:
+                        if "." in str(result):
+                            return float(result)
+                        else:
+                            return int(result)
+                    except Exception:
+                        pass
+                else:            
+                    for typ in valueType:
                         try:
-                            if "." in str(result):
-                                return float(result)
-                            else:
-                                return int(result)
+                            return _convert(typ, result)
                         except Exception:
                             pass
-                    else:            
-                        for typ in valueType:
-                            try:
-                                return eval("%s(%s)" % (typ, result))
-                            except Exception:
-                                pass
-                else:
-                    try:
-                        return eval("%s(%s)" % (valueType, result))
-                    except Exception:                     
-                        pass
+            else:
+                try:
+                    return _convert(valueType, result)
+                except Exception:                     
+                    pass
         else:
             return default
     except Exception:
@@ -25,6 +25,7 @@ import os
 
 from optionwrite import optionWrite
 from optionget import optionGet
+from trackcache import defaultSize
 from processor import ParameterFrame, OptionFrame
 from commonframes  import TimeFrame
 from window import placeWindow
@@ -229,12 +230,48 @@ class GeneralOptions(OptionsCM, Toplevel):
         # processor options
         self.processorOptions = OptionFrame(self, text = "Default process options")
 
+        # memory for loaded files
+        self.cacheSizeVar = StringVar()
+        self.cacheSizeVar.set(optionGet("TrackCacheSize", defaultSize, "int", True))
+
+        self.cacheSizeFrame = ttk.Labelframe(self, text = "Memory for loaded files")
+        self.cacheSizeEntry = ttk.Entry(self.cacheSizeFrame, textvariable = self.cacheSizeVar,
+                                        width = 6, justify = "right")
+        self.cacheSizeLab = ttk.Label(self.cacheSizeFrame, text = "MB")
+
+        self.cacheSizeEntry.grid(row = 0, column = 0, padx = 2, pady = 2, sticky = W)
+        self.cacheSizeLab.grid(row = 0, column = 1, padx = 2, pady = 2, sticky = W)
+
+        # number of processes used for processing of files
+        self.processesVar = StringVar()
+        self.processesVar.set(optionGet("ProcessorProcesses", 1, "int", True))
+
+        self.processesFrame = ttk.Labelframe(self, text = "Parallel processing")
+        self.processesEntry = ttk.Entry(self.processesFrame, textvariable = self.processesVar,
+                                        width = 6, justify = "right")
+        self.processesLab = ttk.Label(self.processesFrame, text = "processes")
+
+        self.processesEntry.grid(row = 0, column = 0, padx = 2, pady = 2, sticky = W)
+        self.processesLab.grid(row = 0, column = 1, padx = 2, pady = 2, sticky = W)
+
+        # maximum frame rate of the animation in Explorer
+        self.fpsVar = StringVar()
+        self.fpsVar.set(optionGet("ExplorerFPS", 25, "int", True))
+
+        self.fpsFrame = ttk.Labelframe(self, text = "Animation in Explorer")
+        self.fpsEntry = ttk.Entry(self.fpsFrame, textvariable = self.fpsVar,
+                                  width = 6, justify = "right")
+        self.fpsLab = ttk.Label(self.fpsFrame, text = "frames per second")
+
+        self.fpsEntry.grid(row = 0, column = 0, padx = 2, pady = 2, sticky = W)
+        self.fpsLab.grid(row = 0, column = 1, padx = 2, pady = 2, sticky = W)
 
         self._createButtons()
         self.commentColor = ttk.Button(self, text = "Comment color",
                                        command = self.chooseCommentColor)
 
-        self.commentColor.grid(column = 2, row = 0, padx = 2, pady = 2)
+        self.commentColor.grid(column = 2, row = 0, padx = 2, pady = 2, sticky = N)
+        self.fpsFrame.grid(row = 0, column = 2, padx = 3, pady = 4, sticky = (S, W, E))
         self.fileTypeFrame.grid(row = 0, column = 0, padx = 3, pady = 4,
                                 sticky = (W, N, E, S))
         self.buttonFrame.grid(row = 3, column = 0, columnspan = 3, padx = 3, pady = 6,
@@ -243,6 +280,8 @@ class GeneralOptions(OptionsCM, Toplevel):
                                  sticky = (W, N, E))
         self.saveFilenameAs.grid(row = 0, column = 1, padx = 3, pady = 4, sticky = (N, W, E))
         self.processorOptions.grid(row = 1, column = 1, pady = 4, padx = 4, sticky = (N, W))
+        self.cacheSizeFrame.grid(row = 1, column = 2, padx = 3, pady = 4, sticky = (N, W, E))
+        self.processesFrame.grid(row = 1, column = 2, padx = 3, pady = 4, sticky = (S, W, E))
         self.directoriesFrame.grid(row = 2, column = 0, columnspan = 3, padx = 3, pady = 4)
 
 
@@ -257,6 +296,27 @@ class GeneralOptions(OptionsCM, Toplevel):
         optionWrite("DefSaveTags", self.processorOptions.saveTags.get(), True)
         optionWrite("DefSaveComments", self.processorOptions.saveComments.get(), True)
         optionWrite("DefShowResults", self.processorOptions.showResults.get(), True)
+        if self.cacheSizeVar.get().strip().isdigit():
+            optionWrite("TrackCacheSize", int(self.cacheSizeVar.get()), True)
+        else:
+            messagebox.showinfo(message = "Memory for loaded files has to be a whole number.",
+                                icon = "error", parent = self, title = "Error",
+                                detail = "Write the number of megabytes.")
+            return False
+        if self.processesVar.get().strip().isdigit() and int(self.processesVar.get()) > 0:
+            optionWrite("ProcessorProcesses", int(self.processesVar.get()), True)
+        else:
+            messagebox.showinfo(message = "Number of processes has to be a positive whole number.",
+                                icon = "error", parent = self, title = "Error",
+                                detail = "Use 1 to process files one after another.")
+            return False
+        if self.fpsVar.get().strip().isdigit() and int(self.fpsVar.get()) > 0:
+            optionWrite("ExplorerFPS", int(self.fpsVar.get()), True)
+        else:
+            messagebox.showinfo(message = "Frame rate has to be a positive whole number.",
+                                icon = "error", parent = self, title = "Error",
+                                detail = "Write the maximum number of frames per second.")
+            return False
         for option in self.directoryOptions:
             directory = eval("self.{}.get()".format(option[1])).rstrip("\/")
             if os.path.exists(directory):
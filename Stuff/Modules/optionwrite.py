@@ -20,11 +20,14 @@ along with Carousel Maze Manager.  If not, see <http://www.gnu.org/licenses/>.
 import os
 
 import mode as m
+from optionget import options
 
 
 def optionWrite(option, newValue, general = False):
     """writes newValue as an option into file Option.txt located in directory 'Stuff' in working
-    directory"""
+    directory
+        - the file is replaced at once by a rewritten copy, so it is never read half-written,
+            and options kept in memory (see optionget.Options) are updated"""
     if not os.path.exists(os.path.join(os.getcwd(), "Stuff")):
         raise Exception("Working directory doesn't contain Stuff directory")
 
@@ -36,20 +39,18 @@ def optionWrite(option, newValue, general = False):
     if not general:
         option = m.mode + option
     optString = "%|" + option + "|%"
-    outfile = open(optionFile, mode = "r")
-    tempfile = open(os.path.join(os.getcwd(), "Stuff", "~Options.txt"), mode = "w")
+    tempname = os.path.join(os.getcwd(), "Stuff", "~Options.txt")
 
     optionExists = False
-    for line in outfile:
-        if optString in line:
+    with open(optionFile, mode = "r") as outfile, open(tempname, mode = "w") as tempfile:
+        for line in outfile:
+            if optString in line:
+                tempfile.write(optString + " " + str(newValue) + "\n")
+                optionExists = True
+            else:
+                tempfile.write(line)
+        if not optionExists:
             tempfile.write(optString + " " + str(newValue) + "\n")
-            optionExists = True
-        else:
-            tempfile.write(line)
-    if not optionExists:
-        tempfile.write(optString + " " + str(newValue) + "\n")
-
-    outfile.close()
-    tempfile.close()
-    os.remove(optionFile)
-    os.rename(os.path.join(os.getcwd(), "Stuff", "~Options.txt"), optionFile)
+
+    os.replace(tempname, optionFile)
+    options.load(optionFile)
@@ -19,21 +19,19 @@ along with Carousel Maze Manager.  If not, see <http://www.gnu.org/licenses/>.
 
 from tkinter import *
 from tkinter import ttk
-from time import time, localtime, strftime
-from operator import methodcaller
-from collections import OrderedDict
+from time import time
+from concurrent.futures import ProcessPoolExecutor, wait
 import os.path
 import os
-import csv
 
 
-from commonframes  import TimeFrame, SaveToFrame, returnName
+from commonframes  import TimeFrame, SaveToFrame
 from filestorage import FileStorageFrame
 from optionget import optionGet
 from optionwrite import optionWrite
-from version import version
 from window import placeWindow
 from tools import SetBatchTime
+from batch import Batch, Log, computeFile, processFile, removeReflections, writeResults
 import mode as m
 
 
@@ -151,125 +149,51 @@ class Processor(ttk.Frame):
             self.progressWindow = ProgressWindow(self, len(self.filesToProcess))     
 
         # initializations
-        output = self.saveToFrame.saveToVar.get()
-        if not os.path.splitext(output)[1]:
-            output = output + optionGet("DefProcessOutputFileType", ".txt", "str", True)
-        if not os.path.dirname(output):
-            output = os.path.join(optionGet("ResultDirectory", os.getcwd(), "str", True), output)
         startTime = float(self.timeFrame.startTimeVar.get())
         time = float(self.timeFrame.timeVar.get())
-        separator = optionGet("ResultSeparator", ",", "str", True)
         batchTime = self.selectedBatchTime if self.useBatchTimeVar.get() else None
-        self.someProblem = False
-        developer = optionGet("Developer", False, 'bool', True)
-
-        # selected methods          
-        methods = OrderedDict()
-        parameters = m.parameters
-        for name, par in parameters.items():
-            if eval("self.parametersF.%sVar.get()" % (name.replace(" ", ""))):
-                options = {name: optionGet(*option[0]) for name, option in par.options.items()}
-                if not self.useBatchTimeVar.get():
-                    methods[name] = [methodcaller(par.method, startTime = startTime,
-                                                  time = time, **options)]
-                elif name not in parameters.noBatch:
-                    methods[name] = [methodcaller(par.method, startTime = times[0],
-                                                  time = times[1], **options)
-                                     for times in batchTime]
-                else:
-                    methods[name] = [methodcaller(par.method, **options)]
-
-        # log
-        self.log = Log(methods, startTime, time, self.filesToProcess, self.fileStorage,
-                       self.optionFrame.removeReflectionsWhere.get(), output,
-                       batchTime = batchTime)
-                    
-        # results header
-        if self.useBatchTimeVar.get():
-            results = ["File"]
-            for method in methods:
-                if method in parameters.noBatch:
-                    results.append(method)
-                else:
-                    results.extend([method + " ({}-{})".format(start, end) for
-                                    start, end in self.selectedBatchTime])
-            results = separator.join(results)
-        else:
-            results = separator.join(["File"] + [method for method in methods])
-        if self.optionFrame.saveTags.get():
-            results += separator + "Tag"
-        if self.optionFrame.saveComments.get():
-            results += separator + "Comment"
-        
+        names = [name for name in m.parameters if
+                 eval("self.parametersF.%sVar.get()" % (name.replace(" ", "")))]
+        self.batch = Batch(self.fileStorage, names, startTime, time,
+                           self.saveToFrame.saveToVar.get(), batchTime = batchTime,
+                           processWhat = self.optionFrame.processWhat.get(),
+                           removeReflectionsWhere = self.optionFrame.removeReflectionsWhere.get(),
+                           saveTags = self.optionFrame.saveTags.get(),
+                           saveComments = self.optionFrame.saveComments.get())
+        self.log = self.batch.log
+        output = self.batch.output
+
         # computing of results
-        for file in self.filesToProcess:
-            # loading of cm object
-            if methods:
-                try:
-                    if file in self.fileStorage.pairedfiles:
-                        cm = m.CL(file, self.fileStorage.pairedfiles[file])
-                    else:
-                        cm = m.CL(file, "auto")
-
-                    if self.optionFrame.removeReflections(file):
-                        cm.removeReflections(points = self.fileStorage.reflections.get(file,
-                                                                                            None))
-                except Exception as e:
-                    if developer:
-                        print(e)   
-                    filename = returnName(filename = file, allFiles =
-                                          self.fileStorage.arenafiles) 
-                    results += "\n" + filename + "{}NA".format(separator) * len(methods)
-                    self.log.failedToLoad.append(file)
-                    self.someProblem = True
+        jobs = self.batch.jobs()
+        processes = min(optionGet("ProcessorProcesses", 1, "int", True), len(jobs))
+        if processes > 1:
+            executor = ProcessPoolExecutor(processes)
+            computed = self._computeInParallel(executor, jobs)
+        else:
+            executor = None
+            computed = map(computeFile, jobs)
+
+        try:
+            for file, result in zip(self.filesToProcess, computed):
+                if not self.batch.add(file, result):
                     continue
-                                
-            result = []
-
-            for name, funcs in methods.items():
-                for func in funcs:                        
-                    try:
-                        #if method[2] == "custom":
-                            #exec("from Stuff.Parameters import {}".format(method[5]))               
-                        result.append(func(cm))
-                    except Exception as e:
-                        if developer:
-                            print(e)   
-                        result.append("NA")
-                        self.log.methodProblems[name].append(file)
-                        self.someProblem = True
-
-            result = separator.join(map(str, result))
-            if methods:
-                result = separator + result               
-            filename = returnName(filename = file, allFiles = self.fileStorage.arenafiles)      
-            results += "\n" + filename + result
-            
-            # tag inclusion in results
-            if self.optionFrame.saveTags.get(): 
-                if file in self.fileStorage.tagged:
-                    results += separator + "1"
-                else:
-                    results += separator + "0"
-
-            # comment inclusion in results
-            if self.optionFrame.saveComments.get():
-                results += separator + self.fileStorage.comments[file]
-                    
-            # progress window update
-            if len(self.filesToProcess) > 1:
-                if self.stoppedProcessing:
-                    writeResults(output, results)
-                    self.log.stopped = file
-                    self.log.writeLog()
-                    self.status.set("Processing stopped")
-                    return
-                else:
-                    self.progressWindow.addOne()
+
+                # progress window update
+                if len(self.filesToProcess) > 1:
+                    if self.stoppedProcessing:
+                        self.log.stopped = file
+                        self.batch.write()
+                        self.status.set("Processing stopped")
+                        return
+                    else:
+                        self.progressWindow.addOne()
+        finally:
+            if executor:
+                executor.shutdown(wait = False, cancel_futures = True)
 
         # results and log writing, ending of processing
-        writeResults(output, results)
-        self.log.writeLog()
+        self.batch.write()
+        self.someProblem = self.batch.someProblem
         self._setStatusEndProgressWindow()
 
         if self.someProblem:
@@ -277,6 +201,17 @@ class Processor(ttk.Frame):
         elif self.optionFrame.showResults.get():
             os.startfile(output)   
 
+
+    def _computeInParallel(self, executor, jobs):
+        """computes jobs in other processes and yields the results in the order of jobs,
+        the window is updated while waiting for the results"""
+        futures = [executor.submit(computeFile, job) for job in jobs]
+        for future in futures:
+            while not future.done():
+                self.update()
+                wait([future], timeout = 0.05)
+            yield future.result()
+
             
     def _setStatusEndProgressWindow(self):
         if len(self.filesToProcess) > 1:
@@ -326,141 +261,6 @@ class Processor(ttk.Frame):
 
 
 
-class Log():
-    "class representing log of processing"
-    def __init__(self, methods, startTime, stopTime, files, fileStorage, removeReflections,
-                 saveTo, batchTime = None):
-        self.failedToLoad = []
-        self.methods = methods
-        self.methodProblems = {method: [] for method in self.methods}
-        self.startTime = startTime
-        self.stopTime = stopTime
-        self.files = files
-        self.stopped = False
-        self.fileStorage = fileStorage
-        self.removeReflections = removeReflections
-        self.saveTo = saveTo
-        self.batchTime = batchTime
-    
-    def writeLog(self):
-        "writes the log"
-        filepath = optionGet("LogDirectory", os.path.join(os.getcwd(), "Stuff", "Logs"),
-                             "str", True)
-        writeTime = localtime()
-        self.filename = os.path.join(filepath, strftime("%y_%m_%d_%H%M%S", writeTime) + ".txt")
-
-        self.problem = False
-        for method in self.methods:
-            if self.methodProblems[method]:
-                self.problem = True           
-            
-        with open(self.filename, mode = "w") as logfile:
-            logfile.write("CM Manager version " + ".".join(version()) + "\n\n")
-            logfile.write("Task: " + m.fullname[m.mode] + "\n\n")
-            logfile.write("Date: " + strftime("%d %b %Y", writeTime) + "\n")
-            logfile.write("Time: " + strftime("%H:%M:%S", writeTime) + "\n\n\n")
-            self._writeProblems(logfile)
-            self._writeMethods(logfile)
-            self._writeTime(logfile)
-            self._writeSaveIn(logfile)
-            logfile.write("Reflections removed in:\n\t" + self.removeReflections + "\n\n\n")
-            self._writeFiles(logfile)
-            self._writeAddedReflections(logfile)
-
-    def _writeProblems(self, logfile):
-        "writes information about all problems in a logfile"
-        if self.failedToLoad or self.problem or self.stopped:
-            logfile.write("Errors:\n" + "-" * 20 + "\n")
-            if self.stopped:
-                logfile.write("Processing stopped after: " + file + "\n\n")
-            if self.failedToLoad:
-                logfile.write("Failed to load:\n\t")
-                logfile.write("\n\t".join(self.failedToLoad))
-                logfile.write("\n\n")
-            if self.problem:
-                logfile.write("Failed to compute:\n")
-                for method in self.methods:
-                    if self.methodProblems[method]:
-                        logfile.write("\t" + method + ":\n\t\t")
-                        logfile.write("\n\t\t".join(self.methodProblems[method]))
-                        logfile.write("\n")
-                logfile.write("\n")
-            logfile.write("-" * 20 + "\n\n")
-
-    def _writeMethods(self, logfile):
-        "writes information about used methods in a logfile"
-        logfile.write("Methods used:")
-        if self.methods:
-            for method in self.methods:
-                logfile.write("\n\t" + method)
-                if m.parameters[method].options:
-                    for option in m.parameters[method].options.values():
-                        logfile.write("\n\t\t" + option[1] + ": " + str(optionGet(*option[0])))
-        else:
-            logfile.write("\n\tNone")
-        logfile.write("\n\n\n")
-
-    def _writeTime(self, logfile):
-        "writes information about set time in a logfile"
-        logfile.write("Time set:\n")
-        if not self.batchTime:
-            logfile.write("\tStart: " + "{:5.1f}".format(self.startTime) + " minutes\n")
-            logfile.write("\tStop : " + "{:5.1f}".format(self.stopTime) + " minutes\n")
-        else:
-            batchTime = ["{}-{}".format(start, end) for start, end in self.batchTime]
-            logfile.write("\tBatch time [start-end minutes]: " + ", ".join(batchTime) + "\n") 
-        logfile.write("\n\n")
-
-    def _writeSaveIn(self, logfile):
-        "writes information about file where the results were saved in a logfile"
-        file = self.saveTo
-        if not os.path.splitext(file)[1]:
-            file += optionGet("DefProcessOutputFileType", ".txt", "str", True)
-        logfile.write("Results saved in:\n\t" + os.path.abspath(file) + "\n\n\n")
-            
-    def _writeFiles(self, logfile):
-        "writes information about processed files in a logfile"
-        logfile.write("Files processed:")
-        if self.stopped:
-            index = self.files.index(self.stopped)
-            if index == len(self.files):
-                for file in self.files[:index]:
-                    self._writeOneFile(file, logfile)     
-                logfile.write("\nStopped before processing following files:\n\t")
-                for file in self.files[(index + 1):]:
-                    self._writeOneFile(file, logfile)
-            else:
-                for file in self.files:
-                    self._writeOneFile(file, logfile)    
-        else:
-            for file in self.files:
-                self._writeOneFile(file, logfile)   
-
-    def _writeOneFile(self, file, logfile):
-        "writes information about one file in a logfile"
-        logfile.write("\n\t" + file)
-        if file in self.fileStorage.tagged:
-            logfile.write("\tTagged")
-        if self.fileStorage.comments[file]:
-            logfile.write("\n\t\tComment: " + self.fileStorage.comments[file])
-        if file in self.fileStorage.pairedfiles:
-            logfile.write("\n\t\tPaired with: " +
-                          self.fileStorage.pairedfiles[file])
-
-    def _writeAddedReflections(self, logfile):
-        if self.fileStorage.addedReflections and any(self.fileStorage.addedReflections.values()):
-            logfile.write("\n\nAdded reflections:")
-            for file in self.files:
-                if file in self.fileStorage.addedReflections:
-                    if self.fileStorage.addedReflections[file]:
-                        logfile.write("\n\t" + file + "\n\t\t")
-                        added = ",".join(str(p) for p in
-                                         sorted(self.fileStorage.addedReflections[file]))
-                        logfile.write(added)
-                    
-
-
-
 class ProgressWindow(Toplevel):
     "opens new window with progressbar and disables actions on other windows"
     def __init__(self, root, number, text = "processed"):
@@ -542,25 +342,6 @@ class ProgressWindow(Toplevel):
 
 
 
-def writeResults(file, results):
-    "writes 'results' in a 'file'"
-    if not os.path.splitext(file)[1]:
-        file = file + optionGet("DefProcessOutputFileType", ".txt", "str", True)
-    if not os.path.dirname(file):
-        file = os.path.join(optionGet("ResultDirectory", os.getcwd(), "str", True), file)
-    if os.path.splitext(file)[1] == ".csv":
-        results = [[item for item in line.split(",")] for line in results.split("\n")]
-        with open(file, mode = "w", newline = "") as f:
-            writer = csv.writer(f, dialect = "excel")
-            writer.writerows(results)
-            f.close()    
-    else:
-        outfile = open(file, "w")
-        outfile.write(results)
-        outfile.close()
-
-
-
 class ParameterFrame(ttk.Labelframe):
     "helper class for Options representing frame containing default settings of parameters"
     def __init__(self, root, text = "Parameters"):
@@ -714,37 +495,12 @@ class OptionFrame(ttk.Labelframe):
 
     def removeReflections(self, file):
         "returns True is reflections should be removed in the file in argument"
-        where = self.removeReflectionsWhere.get()
-        if where == "no files":
-            return False
-        elif where == "tagged files":
-            if file in self.fileStorage.tagged:
-                return True
-            else:
-                return False
-        elif where == "untagged files":
-            if file in self.fileStorage.tagged:
-                return False
-            else:
-                return True
-        elif where == "all files":
-            return True
+        return removeReflections(self.removeReflectionsWhere.get(), file, self.fileStorage)
 
 
     def processFile(self, file):
         "returns True if the file in argument should be processed"
-        if self.processWhat.get() == "all files":
-            return True
-        elif self.processWhat.get() == "only tagged":
-            if file in self.fileStorage.tagged:
-                return True
-            else:
-                return False
-        elif self.processWhat.get() == "only untagged":
-            if file in self.fileStorage.tagged:
-                return False
-            else:
-                return True        
+        return processFile(self.processWhat.get(), file, self.fileStorage)
 
 
 
@@ -17,23 +17,24 @@ You should have received a copy of the GNU General Public License
 along with Carousel Maze Manager.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from collections import OrderedDict, Counter
+from collections import Counter
 from math import sqrt, ceil
+from array import array
 
 import os
 
 
 from cm import CM
 from funcs import median
+from track import Track
+import diskcache
+import trackcache
 
 
 class RA(CM):
-    cache = OrderedDict()
-
     def __init__(self, nameA, nameR = "auto"):
         "class RA represents data from robot avoidance; nameA - rat file; nameR - robot file"
         self.nameA = nameA
-        self.data = []
         self.interpolated = set()
         self.indices = slice(7,9)
 
@@ -41,33 +42,43 @@ class RA(CM):
         self._setRoomName(nameR)
         
         # in cache?
-        if (self.nameA, self.nameR) in RA.cache:
-            self.__dict__ = RA.cache[(self.nameA, self.nameR)]
+        cached = trackcache.get(("RA", self.nameA, self.nameR))
+        if cached:
+            self.__dict__ = cached
             return
     
-        # processing data from robot frame    
-        with open(self.nameR, "r") as infile:
-            self._processHeader(infile)
-            self.radius = self.trackerResolution * self.arenaDiameter * 100 / 2
-            self._processRoomFile(infile) # robot file generally internally corresponds to roomfile
+        # stored on disk?
+        stamp = diskcache.stamp(self.nameA, self.nameR)
+        stored = diskcache.load("RA", stamp)
+        if stored:
+            self.__dict__ = stored
+        else:
+            # processing data from robot frame
+            with open(self.nameR, "r") as infile:
+                self._processHeader(infile)
+                self.radius = self.trackerResolution * self.arenaDiameter * 100 / 2
+                # robot file generally internally corresponds to roomfile
+                self._processRoomFile(infile)
+
+            # processing data from rat file
+            with open(self.nameA, "r") as infile:
+                # rat file generally internally corresponds to arenafile
+                self._processArenaFile(infile)
 
-        # processing data from rat file
-        with open(self.nameA, "r") as infile:
-            self._processArenaFile(infile) # rat file generally internally corresponds to arenafile
+            self.centerX = self.centerY = self.radius
 
-        self.centerX = self.centerY = self.radius
+            # discards missing points from beginning of self.data
+            self._correctMissingFromBeginning()
 
-        # discards missing points from beginning of self.data
-        self._correctMissingFromBeginning()
-          
-        # exception used for example when all lines are wrong (all positions are 0, 0)
-        if not self.data:
-            raise Exception("Failure in data initialization.")
+            # exception used for example when all lines are wrong (all positions are 0, 0)
+            if not self.data:
+                raise Exception("Failure in data initialization.")
+
+            self.stamp = stamp
+            diskcache.save("RA", stamp, self.__dict__)
 
         # caching
-        RA.cache[(self.nameA, self.nameR)] = self.__dict__
-        if len(RA.cache) > 10:
-            RA.cache.popitem(last = False)
+        trackcache.put(("RA", self.nameA, self.nameR), self.__dict__)
 
 
     def _setRoomName(self, name): # ZMENIT rob na robot???
@@ -93,18 +104,30 @@ class RA(CM):
         return list(map(int, temp))
 
 
+    def _evaluateColumns(self, lines, endsplit):
+        "evaluates a block of lines at once - the result is the same as from _evaluateLine"
+        columns = self._splitColumns(lines, endsplit)
+        centerX, centerY, radius = self.centerX, self.centerY, self.radius
+        columns[2:4] = zip(*[(float(x) - centerX + radius, float(y) - centerY + radius) if
+                             x != "0" or y != "0" else (0, 0) for x, y in zip(*columns[2:4])])
+        return [array(code, list(map(int, column))) for code, column in zip(Track.typecodes, columns)]
+
+
     def _addReinforcedSector(self, string, position):
         self.sectorRadius = eval(string[position+1])   
          
    
-    def _cacheRemoval(self):
-        if (self.nameA, self.nameR) in RA.cache:
-            RA.cache.pop((self.nameA, self.nameR))   
+    def _cacheKey(self):
+        return ("RA", self.nameA, self.nameR)
 
 
     def _returnSame(self, missing):
         toDeleteRat = self._findSame(slice(7,9), missing)
-        addMissing = {row[0] - 1 for row in self.data if tuple(row[7:9]) in toDeleteRat}
+        if not toDeleteRat:
+            return set()
+        xs, ys = self.track.columns[7:9]
+        addMissing = {frame - 1 for frame, x, y in zip(self.track.frame, xs, ys) if
+                      (x, y) in toDeleteRat}
         return addMissing
 
 
@@ -112,8 +135,9 @@ class RA(CM):
         if points == None:
             ps = self.findReflections(time = "max", startTime = 0, results = "indices")
             ps = ps[0] + ps[1]
-            ps += [line[0] for line in self.data if
-                   sqrt((line[2] - line[7])**2 + (line[3] - line[8])**2) < 8]
+            ps += [frame for frame, robotX, robotY, ratX, ratY in
+                   zip(self.track.frame, *self.track.columns[2:4] + self.track.columns[7:9]) if
+                   sqrt((robotX - ratX)**2 + (robotY - ratY)**2) < 8]
         else:
             ps = points
         super().removeReflections(points = ps, deleteSame = deleteSame, bothframes = True)
@@ -144,11 +168,13 @@ class RA(CM):
 
     def getSpeedAfterShock(self, time = 20, startTime = 0, after = 25):
         "returns median speed that the rat travelled 'after' points after shock"
+        start, stop = self.findWindow(startTime, time, strict = True)
         time = time * 60000
-        start = self.findStart(startTime)
 
-        shocks = [content[0] for content in self.data[start:] if
-                  content[5] == 2 and content[1] < time]
+        shocks = [frame for frame, state, t in zip(self.track.frame[start:stop],
+                                                   self.track.columns[5][start:stop],
+                                                   self.track.time[start:stop]) if
+                  state == 2 and t < time]
         if shocks:
             selected = [shocks[0]]
             prev = shocks[0]
@@ -173,11 +199,13 @@ class RA(CM):
 
 
     def getDistanceFromRobot(self, time = 20, startTime = 0, distances = False):
+        start, stop = self.findWindow(startTime, time, strict = True)
         time = time * 60000
-        start = self.findStart(startTime)
 
-        dists = [sqrt((line[2] - line[7])**2 + (line[3] - line[8])**2) for line
-                 in self.data[start:] if line[1] < time]
+        columns = [column[start:stop] for column in
+                   self.track.columns[1:4] + self.track.columns[7:9]]
+        dists = [sqrt((robotX - ratX)**2 + (robotY - ratY)**2) for t, robotX, robotY, ratX, ratY
+                 in zip(*columns) if t < time]
 
         if not distances:
             result = (sum(dists) / len(dists)) / self.trackerResolution
@@ -17,7 +17,7 @@ You should have received a copy of the GNU General Public License
 along with Carousel Maze Manager.  If not, see <http://www.gnu.org/licenses/>.
 """
 
-from collections import deque
+from collections import Counter
 import os
 
 
@@ -33,33 +33,38 @@ def recognizeFiles(filenames):
     filenames.sort()
     if m.files == "one":
         return [], [os.path.normpath(file) for file in filenames]
-    filenames = deque(os.path.normpath(file) for file in filenames)
+    names = [os.path.normpath(file) for file in filenames]
+    arena, room = m.pairing[m.mode]
+
+    # the files are processed in order and a matching file found among the following files is
+    # not processed again - 'following' counts occurences of names after the current file and
+    # 'matched' occurences which were already matched (the next ones are skipped)
+    following = Counter(names)
+    matched = Counter()
     arenaFiles = []
     nonmatchingFiles = []
-    while filenames:
-        first = filenames.popleft()
-        name = os.path.basename(first)
-        splitName = os.path.split(first)
-        if m.pairing[m.mode][0] in name or m.pairing[m.mode][0].lower() in name:
-            base = splitName[1].replace(m.pairing[m.mode][0],
-                                        m.pairing[m.mode][1]).replace(m.pairing[m.mode][0].lower(),
-                                                                      m.pairing[m.mode][1].lower())
-            roomName = os.path.join(splitName[0], base)
-            if roomName in filenames:
+    for first in names:
+        following[first] -= 1
+        if matched[first]:
+            matched[first] -= 1
+            continue
+        directory, name = os.path.split(first)
+        if arena in name or arena.lower() in name:
+            base = name.replace(arena, room).replace(arena.lower(), room.lower())
+            roomName = os.path.join(directory, base)
+            if following[roomName] > matched[roomName]:
                 arenaFiles.append(first)             
-                filenames.remove(roomName)
+                matched[roomName] += 1
             elif os.path.exists(roomName):
                 arenaFiles.append(first)  
             else:
                 nonmatchingFiles.append(first)
-        elif m.pairing[m.mode][1] in name or m.pairing[m.mode][1].lower() in name:
-            base = splitName[1].replace(m.pairing[m.mode][1],
-                                        m.pairing[m.mode][0]).replace(m.pairing[m.mode][1].lower(),
-                                                                      m.pairing[m.mode][0].lower())
-            arenaName = os.path.join(splitName[0], base)
-            if arenaName in filenames:
+        elif room in name or room.lower() in name:
+            base = name.replace(room, arena).replace(room.lower(), arena.lower())
+            arenaName = os.path.join(directory, base)
+            if following[arenaName] > matched[arenaName]:
                 arenaFiles.append(arenaName)
-                filenames.remove(arenaName)
+                matched[arenaName] += 1
             elif os.path.exists(arenaName):
                 arenaFiles.append(arenaName)
             else:
@@ -22,6 +22,7 @@ from tkinter import ttk
 
 from commonframes  import TimeFrame, returnName
 from optionget import optionGet
+from simplify import polyline
 from comment import Comment, commentColor
 import mode as m
 
@@ -240,7 +241,8 @@ class TrackCanvas(Canvas):
             fun = self.create_rectangle if m.mode == "OF" else self.create_oval
             fun(140 - self.r, 140 - self.r, 140 + self.r, 140 + self.r,
                 outline = "black", width = 2)
-            lines = [item + 140 - self.r for row in self.data for item in row[0:2]]
+            lines = polyline([row[0] for row in self.data], [row[1] for row in self.data],
+                             shift = 140 - self.r)
             self.create_line((lines), fill = "black", width = 2, tag = "trajectory")
             
         if self.data:
@@ -292,8 +294,9 @@ class TrackCanvas(Canvas):
                     newlyRemoved.add(point)
             self.removed.update(newlyRemoved)
                        
-            lines = [item + 140 - self.r for row in self.data for item in row[0:2] if not
-                     row[2] in self.removed]
+            rows = [row for row in self.data if not row[2] in self.removed]
+            lines = polyline([row[0] for row in rows], [row[1] for row in rows],
+                             shift = 140 - self.r)
             if len(lines) >= 4: 
                 self.create_line((lines), fill = "black", width = 2, tag = "trajectory")      
 
@@ -0,0 +1,84 @@
+"""
+Copyright 2013 Štěpán Bahník
+
+This file is part of Carousel Maze Manager.
+
+Carousel Maze Manager is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Carousel Maze Manager is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Carousel Maze Manager.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from math import hypot
+
+
+# simplification of drawn tracks - a track of a whole session has tens of thousands of points,
+# but most of them are not visible when the track is drawn on a canvas or in an image
+#   - points closer than 'tolerance' to the previous drawn point are left out first,
+#       the rest of the polyline is simplified by Ramer-Douglas-Peucker algorithm
+#   - tolerance is given in pixels of the drawn polyline (i.e. after scaling), the drawn line
+#       does not differ from the full track by more than about two tolerances
+
+
+def simplify(xs, ys, tolerance = 0.5):
+    "returns indices of points of a polyline which are sufficient for drawing it"
+    if not xs:
+        return []
+
+    # points close to the previous kept point
+    kept = [0]
+    lastX, lastY = xs[0], ys[0]
+    for i in range(1, len(xs)):
+        x, y = xs[i], ys[i]
+        if abs(x - lastX) + abs(y - lastY) > tolerance:
+            kept.append(i)
+            lastX, lastY = x, y
+    if kept[-1] != len(xs) - 1:
+        kept.append(len(xs) - 1)
+    if len(kept) < 3:
+        return kept
+
+    # Ramer-Douglas-Peucker
+    px = [xs[i] for i in kept]
+    py = [ys[i] for i in kept]
+    selected = [False] * len(kept)
+    selected[0] = selected[-1] = True
+    segments = [(0, len(kept) - 1)]
+    while segments:
+        first, last = segments.pop()
+        if last - first < 2:
+            continue
+        x1, y1 = px[first], py[first]
+        dx, dy = px[last] - x1, py[last] - y1
+        length = hypot(dx, dy)
+        if length:
+            distances = [abs(dx*(y - y1) - dy*(x - x1)) for x, y in
+                         zip(px[first + 1:last], py[first + 1:last])]
+            limit = tolerance * length
+        else:
+            distances = [hypot(x - x1, y - y1) for x, y in
+                         zip(px[first + 1:last], py[first + 1:last])]
+            limit = tolerance
+        farthest = max(distances)
+        if farthest > limit:
+            middle = first + 1 + distances.index(farthest)
+            selected[middle] = True
+            segments.append((first, middle))
+            segments.append((middle, last))
+
+    return [index for index, used in zip(kept, selected) if used]
+
+
+def polyline(xs, ys, scale = 1, shift = 0, tolerance = 0.5):
+    """returns flat list of coordinates (x1, y1, x2, y2, ...) of a simplified polyline
+        - coordinates are transformed as value*scale + shift"""
+    return [value*scale + shift for i in simplify(xs, ys, tolerance / scale)
+            for value in (xs[i], ys[i])]
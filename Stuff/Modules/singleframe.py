@@ -22,14 +22,12 @@ class SF:
     def _correctMissingFromBeginning(self):
         beginMiss = 0
         
-        for line in self.data:
-            if (line[2] == 0 and line[3] == 0):
+        for x, y in zip(*self.track.columns[2:4]):
+            if (x == 0 and y == 0):
                 beginMiss += 1
             else:
                 if beginMiss != 0:
-                    self.data = self.data[beginMiss:]
-                    for i in range(len(self.data)):
-                        self.data[i][0] -= beginMiss
+                    self.track.discard(beginMiss)
                     self.interpolated = {p - beginMiss for p in self.interpolated}
                 break
 
@@ -41,7 +39,11 @@ class SF:
 
     def _returnSame(self, missing):
         toDeleteRoom = self._findSame(slice(2,4), missing)
-        addMissing = {row[0] - 1 for row in self.data if tuple(row[2:4]) in toDeleteRoom}
+        if not toDeleteRoom:
+            return set()
+        frames = self.track.frame
+        xs, ys = self.track.columns[2:4]
+        addMissing = {frame - 1 for frame, x, y in zip(frames, xs, ys) if (x, y) in toDeleteRoom}
         return addMissing
 
 
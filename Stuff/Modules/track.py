@@ -0,0 +1,207 @@
+"""
+Copyright 2013 Štěpán Bahník
+
+This file is part of Carousel Maze Manager.
+
+Carousel Maze Manager is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Carousel Maze Manager is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Carousel Maze Manager.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from array import array
+
+
+
+class Track:
+    """
+    columnar storage of tracking data - each column of a data file is stored in a typed array
+        - columns are in the same order as items of a row in CM.data, i.e.
+            FrameCount(0) msTimeStamp(1) RoomX(2) RoomY(3) Sectors(4) State(5) CurrentLevel(6)...
+            ...ArenaX(7) ArenaY(8) Sectors(9) State(10) CurrentLevel(11)
+        - time stamps and positions are stored as floats (interpolated values need not be
+            whole numbers), other columns as integers
+        - single frame tasks use only first 6 or 7 columns
+        - values computed from the data (e.g. angles of positions) may be stored in
+            self.derived, they are discarded whenever the data are changed
+    """
+    typecodes = ("l", "d", "d", "d", "l", "l", "l", "d", "d", "l", "l", "l")
+
+    def __init__(self, width = 12):
+        self.columns = [array(code) for code in Track.typecodes[:width]]
+        self.derived = {}
+
+
+    @classmethod
+    def fromRows(cls, rows, width = None):
+        "returns Track containing data from a list of rows"
+        if width is None:
+            width = len(rows[0]) if rows else 12
+        track = cls(width)
+        for column, values in enumerate(track.columns):
+            values.extend([row[column] for row in rows])
+        return track
+
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    @property
+    def width(self):
+        return len(self.columns)
+
+    @property
+    def frame(self):
+        return self.columns[0]
+
+    @property
+    def time(self):
+        return self.columns[1]
+
+    @property
+    def nbytes(self):
+        "number of bytes taken by the data"
+        columns = list(self.columns)
+        # copied at once, the track can be measured by trackcache in another thread
+        for value in list(self.derived.values()):
+            if isinstance(value, array):
+                columns.append(value)
+            elif isinstance(value, tuple):
+                columns.extend(item for item in value if isinstance(item, array))
+            elif isinstance(value, dict):
+                columns.extend(item for item in list(value.values()) if isinstance(item, array))
+        return sum(column.itemsize * len(column) for column in columns)
+
+    @property
+    def rows(self):
+        "row view of the track - see DataView"
+        return DataView(self.columns)
+
+
+    def copy(self):
+        "returns a copy of the track - derived values are not copied"
+        track = Track(0)
+        track.columns = [column[:] for column in self.columns]
+        return track
+
+
+    def row(self, index):
+        "returns a copy of a row as a list"
+        return [column[index] for column in self.columns]
+
+
+    def changed(self):
+        "has to be called when values in the columns are changed"
+        self.derived.clear()
+
+
+    def discard(self, number):
+        "removes first 'number' rows and renumbers frames so that they start from 1 again"
+        self.changed()
+        for column in self.columns:
+            del column[:number]
+        frames = self.columns[0]
+        for i in range(len(frames)):
+            frames[i] -= number
+
+
+    def truncate(self, length):
+        "removes all rows after the first 'length' rows"
+        self.changed()
+        for column in self.columns:
+            del column[length:]
+
+
+
+def _number(value):
+    "floats which are whole numbers are returned as integers, as they were stored before"
+    if type(value) is float and value.is_integer():
+        return int(value)
+    return value
+
+
+
+class DataView:
+    """
+    list-like view of a Track keeping the old representation of CM.data - a list of rows
+        - cm.data[i][j] returns j-th item of i-th row
+        - slicing returns a list of rows
+        - rows are views as well, therefore changes made to them are written to the track
+    """
+    __slots__ = ("columns",)
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def _index(self, index):
+        length = len(self.columns[0])
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("list index out of range")
+        return index
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [RowView(self.columns, i) for i in range(*key.indices(len(self)))]
+        return RowView(self.columns, self._index(key))
+
+    def __setitem__(self, key, row):
+        index = self._index(key)
+        for column, value in zip(self.columns, row):
+            column[index] = value
+
+    def __iter__(self):
+        columns = self.columns
+        return (RowView(columns, i) for i in range(len(columns[0])))
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+
+class RowView:
+    "view of one row of a Track - see DataView"
+    __slots__ = ("columns", "index")
+
+    def __init__(self, columns, index):
+        self.columns = columns
+        self.index = index
+
+    def __len__(self):
+        return len(self.columns)
+
+    def __getitem__(self, key):
+        index = self.index
+        if isinstance(key, slice):
+            return [_number(column[index]) for column in self.columns[key]]
+        return _number(self.columns[key][index])
+
+    def __setitem__(self, key, value):
+        index = self.index
+        if isinstance(key, slice):
+            for column, item in zip(self.columns[key], value):
+                column[index] = item
+        else:
+            self.columns[key][index] = value
+
+    def __iter__(self):
+        index = self.index
+        return (_number(column[index]) for column in self.columns)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
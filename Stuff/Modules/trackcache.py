@@ -0,0 +1,152 @@
+"""
+Copyright 2013 Štěpán Bahník
+
+This file is part of Carousel Maze Manager.
+
+Carousel Maze Manager is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Carousel Maze Manager is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Carousel Maze Manager.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from collections import OrderedDict
+import sys
+import threading
+
+
+# default memory used for loaded files (in MB) - can be changed in General options
+defaultSize = 200
+
+
+class TrackCache:
+    """
+    loaded data (attributes of CM objects) shared by all tasks - keys are tuples of the name
+        of the class and names of the files, e.g. ("CM", nameA, nameR)
+        - the least recently used data are removed when the memory taken by the stored tracks
+            exceeds the limit (in bytes); the last stored data are always kept
+        - sizes are measured again whenever data are stored or returned, because values
+            computed from the data are added to the tracks later (see Track.derived)
+        - limit None means that the limit is read from options each time data are stored
+        - Explorer stores data from a worker thread while the main thread adds values to
+            the stored tracks, therefore sizes are measured from copies of their dictionaries
+    """
+    def __init__(self, limit = None):
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.size = 0
+        self.limit = limit
+        self.lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+    def get(self, key):
+        """returns stored attributes or None if they are not stored
+            - values computed from the data may have been added to the track since the
+                attributes were stored, therefore their size is measured again"""
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                attributes = self.entries[key]
+                self._resize(key)
+                self._evict()
+                return attributes
+            self.misses += 1
+            return None
+
+
+    def put(self, key, attributes):
+        "stores attributes and removes the least recently used ones if there is not enough memory"
+        with self.lock:
+            self.remove(key)
+            self.entries[key] = attributes
+            self.sizes[key] = 0
+            for stored in self.entries:
+                self._resize(stored)
+            self._evict()
+
+
+    def _resize(self, key):
+        "measures the size of stored attributes again"
+        size = _size(self.entries[key])
+        self.size += size - self.sizes[key]
+        self.sizes[key] = size
+
+
+    def _evict(self):
+        "removes the least recently used attributes if there is not enough memory"
+        limit = self._limit()
+        while self.size > limit and len(self.entries) > 1:
+            oldest = next(iter(self.entries))
+            self.remove(oldest)
+            self.evictions += 1
+
+
+    def remove(self, key):
+        "removes attributes from the cache (e.g. when data are changed)"
+        with self.lock:
+            if key in self.entries:
+                del self.entries[key]
+                self.size -= self.sizes.pop(key)
+
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.sizes.clear()
+            self.size = 0
+
+
+    def statistics(self):
+        "returns dictionary with information about usage of the cache"
+        return {"entries": len(self.entries), "size": self.size, "limit": self._limit(),
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+    def _limit(self):
+        if self.limit is not None:
+            return self.limit
+        # imported here, because optionget imports (through mode) modules which import this one
+        from optionget import optionGet
+        return max(optionGet("TrackCacheSize", defaultSize, "int", general = True), 0) * 2**20
+
+
+
+def _size(attributes):
+    "returns approximate number of bytes taken by loaded data"
+    size = sys.getsizeof(attributes)
+    # copied at once, so that values added by another thread do not break the iteration
+    for value in list(attributes.values()):
+        if hasattr(value, "nbytes"):
+            size += value.nbytes
+        else:
+            size += sys.getsizeof(value)
+    return size
+
+
+
+# cache used by all classes representing loaded files
+tracks = TrackCache()
+
+
+def get(key):
+    return tracks.get(key)
+
+def put(key, attributes):
+    tracks.put(key, attributes)
+
+def remove(key):
+    tracks.remove(key)
+
+def statistics():
+    return tracks.statistics()
@@ -16,6 +16,9 @@ are not needed since they won't be provided during processing.
 
 CM object has several important parameters:
 CM.data - contains data obtained from the arena and room .dat files
+CM.track - contains the same data stored by columns, CM.track.columns[j] is an array containing j-th
+    item of every row (e.g. CM.track.columns[1] contains all time stamps) - it is faster to use than
+    CM.data for long recordings
 CM.centerX - x coordinate of center position
 CM.centerY - y coordinate of center position
 CM.width - width of the sector
@@ -24,7 +27,7 @@ CM.trackerResolution - reolution of the tracker in pixels / centimeter
 ... 'CM' should be exchenged by the name of the first argument in the body of the function (e.g.
 by 'cm' in the template example).
 
-CM.data are represented as a list of lists. 
+CM.data behave as a list of lists. 
     Each row of a data file is represented by a list within the returned list.
     Each row contains following information:
         FrameCount(0) msTimeStamp(1) RoomX(2) RoomY(3) Sectors(4) State(5) CurrentLevel(6)...